@@ -1,13 +1,18 @@
 import streamlit as st
 import pandas as pd
 import os
-from pymongo import MongoClient
-from collections import defaultdict, deque
 from dotenv import load_dotenv
 import altair as alt
+from genesis_analytics import engine, spans
+from genesis_analytics.candidates import load_candidate_swaps
+from genesis_analytics.db import swap_db
+from genesis_analytics.mirror import SwapMirror
+from genesis_analytics.snapshots import MAX_SNAPSHOT_AGE, FileSnapshotSink, MongoSnapshotSink, is_fresh, snapshot_time
+from genesis_analytics.swaps import IncrementalSwapStore
 
 # Streamlit Page Setup - MUST be first command
 st.set_page_config(page_title="Sniper PnL Dashboard", layout="wide")
+spans.start_run("global_snipers", count_bytes=bool(st.query_params.get("perf")))
 # ───── Global Styling ─────
 st.markdown("""
     <style>
@@ -78,279 +83,88 @@ st.markdown("""
 
 load_dotenv()
 
-# MongoDB Connection
 @st.cache_resource
-def get_mongo_client():
-    """Cache MongoDB client connection"""
-    return MongoClient(os.getenv("MONGO_URL"))
+def get_pipeline():
+    """Cache one incremental swap store shared by every session, seeded from the local Parquet mirror"""
+    return engine.VersionedPipeline(IncrementalSwapStore(swap_db(), mirror=SwapMirror()))
 
 @st.cache_data(ttl=300)  # Cache for 5 minutes
+def load_data_version():
+    """Fetch only swaps newer than the last refresh and return the data version"""
+    spans.cache_miss()
+    return get_pipeline().refresh()
+
 def load_swap_data():
-    """Load and cache swap data from MongoDB"""
-    client = get_mongo_client()
-    db = client["genesis_tokens_swap_info"]
-    
-    # swap_collections = [col for col in db.list_collection_names() if col.endswith('_swap')]
-    swap_collections = ['jarvis_swap', 'afath_swap', 'pilot_swap', 'tian_swap', 'vgn_swap', 'badai_swap',
-                       'bolz_swap', 'trivi_swap', 'vruff_swap', 'wbug_swap', 'aispace_swap', 'wint_swap', 
-                       'ling_swap', 'gloria_swap', 'light_swap', 'rwai_swap', 'nyko_swap', 'super_swap',
-                       'xllm2_swap', 'maneki_swap', 'whim_swap']
-    combined_df = pd.DataFrame()
-
-    for col_name in swap_collections:
-        token_name = col_name.replace('_swap', '')  
-        token_prefix = token_name.upper() + "_"     
-        # Build projection dict with correct prefixed column names
-        projection = {
-            f"{token_prefix}OUT_BeforeTax": 1,
-            f"{token_prefix}OUT_AfterTax": 1,
-            f"{token_prefix}IN_BeforeTax": 1,
-            f"{token_prefix}IN_AfterTax": 1,
-            "maker": 1,
-            "token_name": 1,
-            "swapType": 1,
-            "timestamp": 1,
-            "timestampReadable": 1,
-            "blockNumber": 1,
-            "genesis_usdc_price": 1,
-            "transactionFee": 1,
-            "Tax_1pct": 1
-        }
-        collection = db[col_name]
-        data = list(collection.find({}, projection))
-        if not data:
-            continue
-        df = pd.DataFrame(data)
-        df.drop(columns=['_id'], errors='ignore', inplace=True)
-        # Remove token prefix from relevant columns
-        df.columns = [col.replace(token_prefix, '') if col.startswith(token_prefix) else col for col in df.columns]
-        df["token_name"] = token_name.upper()
-        combined_df = pd.concat([combined_df, df], ignore_index=True)
-
-    if combined_df.empty:
-        return None
+    """The resident combined swap frame, shared by every session rather than copied out of a cache"""
+    load_data_version()
+    return get_pipeline().combined()
 
-    combined_df = combined_df.dropna(subset=['transactionFee'])
-    combined_df = combined_df.dropna(subset=['genesis_usdc_price'])
-    combined_df['timestampReadable'] = pd.to_datetime(combined_df['timestampReadable'])
-    
-    return combined_df
+@st.cache_data(ttl=300)  # Cache for 5 minutes
+def load_candidate_pnl(token_launch_blocks):
+    """Load only the swaps of sniper candidates, selected by Mongo aggregations, and calculate their PnL"""
+    spans.cache_miss()
+    combined_df, latest_prices, stats = load_candidate_swaps(swap_db(), token_launch_blocks)
+    print("Candidate load:", ", ".join(f"{r.collection} {r.candidates} makers {r.seconds:.2f}s" for r in stats.itertuples()))
+    if combined_df is None:
+        return None
+    return engine.pnl(engine.detect(combined_df, token_launch_blocks), combined_df, latest_prices=latest_prices)
 
 @st.cache_data(ttl=600)  # Cache for 10 minutes
 def load_launch_blocks():
     """Load and cache launch block information"""
-    client = get_mongo_client()
-    db = client["genesis_tokens_swap_info"]
-    db_persona = client["virtualgenesis"]
-    
-    try:
-        launch_info = list(db["Personas"].find({}, {"symbol": 1, "blockNumber": 1})) 
-        launch_df = pd.DataFrame(launch_info)
-        
-        # Check if the DataFrame has the expected columns
-        if not launch_df.empty and 'symbol' in launch_df.columns and 'blockNumber' in launch_df.columns:
-            token_launch_blocks = dict(zip(launch_df['symbol'], launch_df['blockNumber']))
-        else:
-            # use the combined_df to get launch blocks
-            combined_df = load_swap_data()
-            if combined_df is not None:
-                token_launch_blocks = combined_df.sort_values(by='blockNumber').groupby('token_name')['blockNumber'].first().to_dict()
-            else:
-                token_launch_blocks = {}
-            print("Warning: Could not fetch launch info from Personas collection, using fallback method")
-    except Exception as e:
-        print(f"Error fetching launch info: {e}")
-        # use the combined_df to get launch blocks
-        combined_df = load_swap_data()
-        if combined_df is not None:
-            token_launch_blocks = combined_df.sort_values(by='blockNumber').groupby('token_name')['blockNumber'].first().to_dict()
-        else:
-            token_launch_blocks = {}
-    
-    return token_launch_blocks
+    spans.cache_miss()
+    db = swap_db()
+    # The full swap load is only needed when Personas has no launch blocks
+    return engine.launch_blocks(db) or engine.launch_blocks(db, load_swap_data())
 
 @st.cache_data(ttl=300)  # Cache for 5 minutes
-def process_sniper_data(combined_df, token_launch_blocks):
-    """Process and cache sniper identification logic"""
-    # Identify Large Buys
-    buy_df = combined_df[combined_df['swapType'] == 'buy'].copy()
-    buy_df = buy_df.sort_values(by=['maker', 'token_name', 'timestampReadable'])
-    chunked_buys = []
-    time_threshold = pd.Timedelta(minutes=10)
-
-    for (maker, token), group in buy_df.groupby(['maker', 'token_name']):
-        current_chunk = []
-        current_sum = 0
-        chunk_start_time = None
-        for row in group.itertuples():
-            if not current_chunk:
-                chunk_start_time = row.timestampReadable
-                current_chunk = [row]
-                current_sum = row.OUT_BeforeTax
-            else:
-                if row.timestampReadable - chunk_start_time <= time_threshold:
-                    current_chunk.append(row)
-                    current_sum += row.OUT_BeforeTax
-                else:
-                    if current_sum > 100000:
-                        chunked_buys.extend(current_chunk)
-                    chunk_start_time = row.timestampReadable
-                    current_chunk = [row]
-                    current_sum = row.OUT_BeforeTax
-        if current_sum > 100000:
-            chunked_buys.extend(current_chunk)
-
-    df_chunked_large_buys = pd.DataFrame(chunked_buys).drop_duplicates()
-    df_high_gas = df_chunked_large_buys[df_chunked_large_buys['transactionFee'] > 0.000002]
-
-    def is_sniper_buy(row):
-        launch_block = token_launch_blocks.get(row['token_name'])
-        return launch_block is not None and row['blockNumber'] <= launch_block + 100
-
-    df_sniper_buys = df_high_gas[df_high_gas.apply(is_sniper_buy, axis=1)]
-
-    sells = combined_df[combined_df['swapType'] == 'sell'][['maker', 'timestampReadable', 'token_name']]
-
-    merged = pd.merge(
-        df_sniper_buys[['maker', 'timestampReadable', 'token_name']],
-        sells,
-        on=['maker', 'token_name'],
-        suffixes=('_buy', '_sell')
-    )
-
-    merged['time_diff'] = (merged['timestampReadable_sell'] - merged['timestampReadable_buy']).dt.total_seconds()
-    quick_sells = merged[merged['time_diff'].between(0, 20 * 60)]
-
-    potential_sniper_df = df_sniper_buys[df_sniper_buys['maker'].isin(quick_sells['maker'])].copy()
-    
-    return potential_sniper_df, combined_df
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def calculate_pnl(potential_sniper_df, combined_df):
-    """Calculate and cache PnL results"""
-    results = []
-    sniper_pairs = potential_sniper_df[['maker', 'token_name']].drop_duplicates()
-
-    for _, row in sniper_pairs.iterrows():
-        maker = row['maker']
-        token = row['token_name']
-        df = combined_df[(combined_df['maker'] == maker) & (combined_df['token_name'] == token)]
-        df = df.sort_values(by='timestamp')
-        trades_by_maker = defaultdict(list)
-
-        buy_txn_count = (df['swapType'] == 'buy').sum()
-        sell_txn_count = (df['swapType'] == 'sell').sum()
-        first_buy_time = df.loc[df['swapType'] == 'buy', 'timestampReadable'].min()
-        last_sell_time = df.loc[df['swapType'] == 'sell', 'timestampReadable'].max()
-        avg_buy_price = df.loc[df['swapType'] == 'buy', 'genesis_usdc_price'].mean()
-        avg_sell_price = df.loc[df['swapType'] == 'sell', 'genesis_usdc_price'].mean()
-        total_tax_paid = df['Tax_1pct'].sum()
-        total_transaction_fee_paid = df['transactionFee'].sum()
-
-        for _, doc in df.iterrows():
-            swap_type = doc.get("swapType")
-            price = float(doc.get("genesis_usdc_price", 0) or 0)
-            if price <= 0:
-                continue
-            if swap_type == "buy":
-                amount_bought_before_tax = float(doc.get("OUT_BeforeTax", 0) or 0)
-                amount_received = float(doc.get("OUT_AfterTax", 0) or 0)
-                if amount_bought_before_tax <= 0:
-                    continue
-                trades_by_maker[maker].append({
-                    'type': 'buy',
-                    'amount_bought_before_tax': amount_bought_before_tax,
-                    'amount_received': amount_received,
-                    'price': price
-                })
-            elif swap_type == "sell":
-                amount_sold_net = float(doc.get("IN_AfterTax", 0) or 0)
-                amount_from_wallet = float(doc.get("IN_BeforeTax", 0) or 0)
-                if amount_sold_net <= 0:
-                    continue
-                trades_by_maker[maker].append({
-                    'type': 'sell',
-                    'amount_sold_net': amount_sold_net,
-                    'amount_from_wallet': amount_from_wallet,
-                    'price': price
-                })
-
-        total_realized_pnl = 0.0
-        remaining_tokens = 0.0
-        buy_queue = deque()
-
-        for trade in trades_by_maker[maker]:
-            if trade['type'] == 'buy':
-                buy_queue.append({
-                    'amount': trade['amount_received'],
-                    'amount_paid_for': trade['amount_bought_before_tax'],
-                    'price': trade['price']
-                })
-            elif trade['type'] == 'sell':
-                remaining_to_match = trade['amount_from_wallet']
-                amount_sold_net = trade['amount_sold_net']
-                sell_price = trade['price']
-
-                while remaining_to_match > 0 and buy_queue:
-                    buy = buy_queue.popleft()
-                    matched_amount = min(remaining_to_match, buy['amount'])
-                    ratio = matched_amount / buy['amount']
-                    matched_paid = buy['amount_paid_for'] * ratio
-
-                    proceeds_ratio = matched_amount / trade['amount_from_wallet']
-                    actual_proceeds = amount_sold_net * sell_price * proceeds_ratio
-                    cost_paid = matched_paid * buy['price']
-
-                    total_realized_pnl += actual_proceeds - cost_paid
-
-                    remaining_to_match -= matched_amount
-                    remaining_buy = buy['amount'] - matched_amount
-                    if remaining_buy > 0:
-                        remaining_paid = buy['amount_paid_for'] * (remaining_buy / buy['amount'])
-                        buy_queue.appendleft({
-                            'amount': remaining_buy,
-                            'amount_paid_for': remaining_paid,
-                            'price': buy['price']
-                        })
-
-        remaining_tokens = sum(b['amount'] for b in buy_queue)
-
-        # Get latest price for the token from combined_df
-        latest_token_row = combined_df[combined_df['token_name'] == token].sort_values(by='timestamp', ascending=False).head(1)
-        if not latest_token_row.empty:
-            latest_price = float(latest_token_row['genesis_usdc_price'].values[0])
-        else:
-            latest_price = 0.0
-        unrealized_pnl = remaining_tokens * latest_price
-
-        results.append({
-            'Sniper Wallet Address': maker,
-            'Token': token,
-            'Net PnL': round(total_realized_pnl, 6),
-            'Unrealized PnL': round(unrealized_pnl, 6),
-            'Remaining Tokens': round(remaining_tokens, 6),
-            'Buy Txn Count': int(buy_txn_count),
-            'Sell Txn Count': int(sell_txn_count),
-            'First Buy Time': first_buy_time,
-            'Last Sell Time': last_sell_time,
-            'Average Buy Price USD': round(avg_buy_price, 6),
-            'Average Sell Price USD': round(avg_sell_price, 6),
-            'Total Tax Paid': round(total_tax_paid, 6),
-            'Total Transaction Fee Paid': round(total_transaction_fee_paid, 6)
-        })
-
-    return pd.DataFrame(results)
+def calculate_pnl(version, token_launch_blocks):
+    """Detect snipers and calculate their PnL for one data version and set of launch blocks"""
+    # Only the short version string and the small launch-block mapping are hashed for the cache
+    # key, so a corrected launch block is picked up at once; the frames stay in the pipeline
+    spans.cache_miss()
+    return get_pipeline().pnl(token_launch_blocks)
+
+@st.cache_data(ttl=60)  # Cache for 1 minute
+def load_materialized_pnl():
+    """Load the latest PnL snapshot published by the genesis_analytics.worker process"""
+    spans.cache_miss()
+    snapshot_dir = os.getenv("SNIPER_PNL_DIR")
+    sink = FileSnapshotSink(snapshot_dir) if snapshot_dir else MongoSnapshotSink(swap_db())
+    return sink.latest()
 
 # Load data with caching
-with st.spinner("Loading data..."):
-    combined_df = load_swap_data()
-    if combined_df is None:
-        st.error("No data found from MongoDB collections.")
-        st.stop()
-    
-    token_launch_blocks = load_launch_blocks()
-    potential_sniper_df, combined_df = process_sniper_data(combined_df, token_launch_blocks)
-    pnl_df = calculate_pnl(potential_sniper_df, combined_df)
+# The worker's latest snapshot is used when there is a recent one; ?mode=live recomputes in
+# the page and ?mode=candidates recomputes from the makers Mongo pre-filters
+page_mode = st.query_params.get("mode")
+candidate_mode = page_mode == "candidates"
+snapshot = stale_meta = None
+if page_mode is None:
+    with spans.span("load_materialized_pnl", cached=True):
+        snapshot = load_materialized_pnl()
+    if snapshot is not None and not is_fresh(snapshot[1]):
+        # The worker stopped or fell behind; compute the table here rather than show old PnL
+        stale_meta, snapshot = snapshot[1], None
+        print(f"PnL snapshot from {snapshot_time(stale_meta)} is older than {MAX_SNAPSHOT_AGE:g}s, computing live")
+if snapshot is not None:
+    pnl_df, snapshot_meta = snapshot
+else:
+    with st.spinner("Loading data..."):
+        with spans.span("load_launch_blocks", cached=True):
+            token_launch_blocks = load_launch_blocks()
+        if candidate_mode:
+            with spans.span("load_candidate_pnl", cached=True) as record:
+                pnl_df = load_candidate_pnl(token_launch_blocks)
+                record["rows_out"] = spans.rows(pnl_df)
+        else:
+            with spans.span("load_data_version", cached=True):
+                version = load_data_version()
+            with spans.span("calculate_pnl", cached=True) as record:
+                pnl_df = calculate_pnl(version, token_launch_blocks)
+                record["rows_out"] = spans.rows(pnl_df)
+        if pnl_df is None:
+            st.error("No data found from MongoDB collections.")
+            st.stop()
 
 with st.sidebar:
     st.markdown("## Navigation")
@@ -405,25 +219,27 @@ with st.sidebar:
     st.markdown("Made for Genesis Analytics @Lampros Tech Labs.")
 
 
-filtered_df = pnl_df.copy()
-filtered_df = filtered_df.reset_index(drop=True)
-filtered_df.insert(0, 'S.No', range(1, len(filtered_df) + 1))
+with spans.span("filter", rows_in=len(pnl_df)) as record:
+    filtered_df = pnl_df.copy()
+    filtered_df = filtered_df.reset_index(drop=True)
+    filtered_df.insert(0, 'S.No', range(1, len(filtered_df) + 1))
 
-# Filter for tokens
-if token_filter:
-    filtered_df = filtered_df[filtered_df["Token"].isin(token_filter)]
+    # Filter for tokens
+    if token_filter:
+        filtered_df = filtered_df[filtered_df["Token"].isin(token_filter)]
 
-# Filter for wallet address (case-insensitive partial search)
-if wallet_search:
-    filtered_df = filtered_df[filtered_df["Sniper Wallet Address"].str.contains(wallet_search, case=False, na=False)]
+    # Filter for wallet address (case-insensitive partial search)
+    if wallet_search:
+        filtered_df = filtered_df[filtered_df["Sniper Wallet Address"].str.contains(wallet_search, case=False, na=False)]
 
-# Filter for date range (First Buy Time) with safe check
-if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
-    start_date, end_date = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
-    filtered_df = filtered_df[(pd.to_datetime(filtered_df["First Buy Time"]).dt.date >= start_date.date()) & (pd.to_datetime(filtered_df["First Buy Time"]).dt.date <= end_date.date())]
+    # Filter for date range (First Buy Time) with safe check
+    if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        start_date, end_date = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
+        filtered_df = filtered_df[(pd.to_datetime(filtered_df["First Buy Time"]).dt.date >= start_date.date()) & (pd.to_datetime(filtered_df["First Buy Time"]).dt.date <= end_date.date())]
 
-# Filter for Net PnL range
-filtered_df = filtered_df[(filtered_df["Net PnL"] >= pnl_range[0]) & (filtered_df["Net PnL"] <= pnl_range[1])]
+    # Filter for Net PnL range
+    filtered_df = filtered_df[(filtered_df["Net PnL"] >= pnl_range[0]) & (filtered_df["Net PnL"] <= pnl_range[1])]
+    record["rows_out"] = len(filtered_df)
 
 # Show warning if sniper address filter yields zero rows
 if wallet_search and filtered_df.empty:
@@ -431,16 +247,22 @@ if wallet_search and filtered_df.empty:
 
 # Streamlit UI
 st.title(f"Potential Snipers – PnL Overview")
+if snapshot is not None:
+    st.caption(f"PnL snapshot of {snapshot_time(snapshot_meta):%Y-%m-%d %H:%M} UTC")
+elif stale_meta is not None:
+    st.caption(f"Computed live: the latest snapshot ({snapshot_time(stale_meta):%Y-%m-%d %H:%M} UTC) "
+               f"is older than {MAX_SNAPSHOT_AGE / 60:g} minutes")
 
 st.subheader("📊 Sniper Summary Table")
 
-# Sort by net_pnl descending
-filtered_df = filtered_df.sort_values(by="Net PnL", ascending=False).reset_index(drop=True)
-filtered_df['S.No'] = range(1, len(filtered_df) + 1)
+with spans.span("render_table", rows_in=len(filtered_df)):
+    # Sort by net_pnl descending
+    filtered_df = filtered_df.sort_values(by="Net PnL", ascending=False).reset_index(drop=True)
+    filtered_df['S.No'] = range(1, len(filtered_df) + 1)
 
-# Autosize all columns
-column_config = {col: {"width": "auto"} for col in filtered_df.columns}
-st.dataframe(filtered_df, hide_index=True, column_config=column_config)
+    # Autosize all columns
+    column_config = {col: {"width": "auto"} for col in filtered_df.columns}
+    st.dataframe(filtered_df, hide_index=True, column_config=column_config)
 
 # Add gap between table and KPIs
 st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
@@ -448,49 +270,56 @@ st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
 
 st.subheader("📊 Global Sniper Metrics")
 
-kpi1, kpi2, kpi3 = st.columns(3)
-with kpi1:
-    st.markdown("<div style='font-size:1.3em; font-weight:bold;'>Total Unique Snipers</div>", unsafe_allow_html=True)
-    st.metric(label="", value=f"{pnl_df['Sniper Wallet Address'].nunique()}")
-with kpi2:
-    st.markdown("<div style='font-size:1.3em; font-weight:bold;'>Total Realized PnL</div>", unsafe_allow_html=True)
-    st.metric(label="", value=f"${pnl_df['Net PnL'].sum():,.2f}")
-with kpi3:
-    st.markdown("<div style='font-size:1.3em; font-weight:bold;'>Total Unrealized PnL</div>", unsafe_allow_html=True)
-    st.metric(label="", value=f"${pnl_df['Unrealized PnL'].sum():,.2f}")
+with spans.span("render_kpis", rows_in=len(pnl_df)):
+    kpi1, kpi2, kpi3 = st.columns(3)
+    with kpi1:
+        st.markdown("<div style='font-size:1.3em; font-weight:bold;'>Total Unique Snipers</div>", unsafe_allow_html=True)
+        st.metric(label="", value=f"{pnl_df['Sniper Wallet Address'].nunique()}")
+    with kpi2:
+        st.markdown("<div style='font-size:1.3em; font-weight:bold;'>Total Realized PnL</div>", unsafe_allow_html=True)
+        st.metric(label="", value=f"${pnl_df['Net PnL'].sum():,.2f}")
+    with kpi3:
+        st.markdown("<div style='font-size:1.3em; font-weight:bold;'>Total Unrealized PnL</div>", unsafe_allow_html=True)
+        st.metric(label="", value=f"${pnl_df['Unrealized PnL'].sum():,.2f}")
 
 # Add gap between KPIs and charts
 st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
 
 # Graphs
 st.subheader("📈 Sniper & Token Activity Overview")
-graph1, graph2 = st.columns(2)
-
-# Top 10 Snipers by Net PnL
-with graph1:
-    top10_snipers = pnl_df.groupby('Sniper Wallet Address')['Net PnL'].sum().nlargest(10).reset_index()
-    chart = alt.Chart(top10_snipers).mark_bar().encode(
-        x=alt.X('Net PnL:Q', title='Net PnL'),
-        y=alt.Y('Sniper Wallet Address:N', sort='-x', title='Sniper Wallet Address'),
-        tooltip=['Sniper Wallet Address', 'Net PnL']
-    ).properties(title='Top 10 Snipers by Net PnL', height=350)
-    st.altair_chart(chart, use_container_width=True)
-
-# Tokens with Most Sniper Activity
-with graph2:
-    token_sniper_counts = pnl_df.groupby('Token')['Sniper Wallet Address'].nunique().sort_values(ascending=False).head(10).reset_index()
-    chart2 = alt.Chart(token_sniper_counts).mark_bar().encode(
-        x=alt.X('Sniper Wallet Address:Q', title='Unique Snipers'),
-        y=alt.Y('Token:N', sort='-x', title='Token'),
-        tooltip=['Token', 'Sniper Wallet Address']
-    ).properties(title='Tokens with Most Sniper Activity', height=350)
-    st.altair_chart(chart2, use_container_width=True)
-
-# Sniper Profit Distribution
-st.subheader("📊 Sniper Profit Distribution")
-hist = alt.Chart(pnl_df).mark_bar().encode(
-    x=alt.X('Net PnL:Q', bin=alt.Bin(maxbins=30), title='Net PnL'),
-    y=alt.Y('count()', title='Number of Snipers'),
-    tooltip=['count()']
-).properties(title='Sniper Profit Distribution', height=300)
-st.altair_chart(hist, use_container_width=True)
+with spans.span("render_charts", rows_in=len(pnl_df)):
+    graph1, graph2 = st.columns(2)
+
+    # Top 10 Snipers by Net PnL
+    with graph1:
+        top10_snipers = pnl_df.groupby('Sniper Wallet Address')['Net PnL'].sum().nlargest(10).reset_index()
+        chart = alt.Chart(top10_snipers).mark_bar().encode(
+            x=alt.X('Net PnL:Q', title='Net PnL'),
+            y=alt.Y('Sniper Wallet Address:N', sort='-x', title='Sniper Wallet Address'),
+            tooltip=['Sniper Wallet Address', 'Net PnL']
+        ).properties(title='Top 10 Snipers by Net PnL', height=350)
+        st.altair_chart(chart, use_container_width=True)
+
+    # Tokens with Most Sniper Activity
+    with graph2:
+        token_sniper_counts = pnl_df.groupby('Token')['Sniper Wallet Address'].nunique().sort_values(ascending=False).head(10).reset_index()
+        chart2 = alt.Chart(token_sniper_counts).mark_bar().encode(
+            x=alt.X('Sniper Wallet Address:Q', title='Unique Snipers'),
+            y=alt.Y('Token:N', sort='-x', title='Token'),
+            tooltip=['Token', 'Sniper Wallet Address']
+        ).properties(title='Tokens with Most Sniper Activity', height=350)
+        st.altair_chart(chart2, use_container_width=True)
+
+    # Sniper Profit Distribution
+    st.subheader("📊 Sniper Profit Distribution")
+    hist = alt.Chart(pnl_df).mark_bar().encode(
+        x=alt.X('Net PnL:Q', bin=alt.Bin(maxbins=30), title='Net PnL'),
+        y=alt.Y('count()', title='Number of Snipers'),
+        tooltip=['count()']
+    ).properties(title='Sniper Profit Distribution', height=300)
+    st.altair_chart(hist, use_container_width=True)
+
+# ───── Performance Panel (?perf=1) ─────
+if st.query_params.get("perf"):
+    with st.sidebar.expander("Performance", expanded=True):
+        st.dataframe(spans.run_frame(), hide_index=True)
@@ -1,17 +1,16 @@
 #--IMPORTING AND GENERAL SETUP
 import os
-from dotenv import load_dotenv
 import streamlit as st
-from pymongo import MongoClient
+from genesis_analytics import spans
+from genesis_analytics.cards import cards_version, token_cards
+from genesis_analytics.db import persona_db
 
 #--STREAMLIT CONFIGURATION
 st.set_page_config(layout="wide")
+spans.start_run("cards2copy", count_bytes=bool(st.query_params.get("perf")))
 
-#--ENVIRONMENT LOADING AND DB CONNECTION
-load_dotenv()
-dbconn = os.getenv("MongoLink")
-client = MongoClient(dbconn)
-db = client['virtualgenesis']
+#--DB CONNECTION (shared pooled client)
+db = persona_db()
 
 # UI elements
 # --GLOBAL CSS
@@ -132,25 +131,29 @@ st.markdown("<h1 style='color: white;'>SUCCESSFULLY LAUNCHED GENESIS TOKENS</h1>
 
 #--MODULARIZATION
 #--DATA FETCHING
-def get_token_list(db):
-    return [doc["symbol"] for doc in db["New Persona"].find({}, {'symbol': 1, '_id': 0}).sort("symbol", 1)]
+# All cards come from one aggregation, cached until the persona collection changes
+CARDS_PER_PAGE = 50
 
-#--TOKEN NAME FETCHER
-def get_names_for_token(db, token):
-    return "".join(
-        f"<p>{doc['name']}</p>"
-        for doc in db["New Persona"].find({"symbol": token}, {"name": 1, "_id": 0})
-    )
+@st.cache_data(ttl=60, show_spinner=False)
+def get_cards_version():
+    spans.cache_miss()
+    return cards_version(db)
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def get_token_cards(version):
+    spans.cache_miss()
+    return token_cards(db)
 
 #--RENDERING TOKEN CARDS
-def render_token_cards(db, tokens, num_cols=5):
-    for i in range(0, len(tokens), num_cols):
-        chunk = tokens[i:i + num_cols]
+def render_token_cards(cards, num_cols=5):
+    for i in range(0, len(cards), num_cols):
+        chunk = cards[i:i + num_cols]
         with st.container():
             cols = st.columns(num_cols, vertical_alignment="center")
-            for j, token in enumerate(chunk):
+            for j, card in enumerate(chunk):
                 with cols[j]:
-                    names_html = get_names_for_token(db, token)
+                    token = card["symbol"]
+                    names_html = "".join(f"<p>{name}</p>" for name in card["names"])
                     card_html = f"""
                     <div class="card">
                         <h1>{token}</h1>
@@ -163,5 +166,20 @@ def render_token_cards(db, tokens, num_cols=5):
 
 #CALLING HELPER FUNCTIONS
 render_sidebar()
-tokens = get_token_list(db)
-render_token_cards(db, tokens)
\ No newline at end of file
+with spans.span("cards_version", cached=True):
+    version = get_cards_version()
+with spans.span("token_cards", cached=True) as record:
+    cards = get_token_cards(version)
+    record["rows_out"] = len(cards)
+shown = st.session_state.get("cards_shown", CARDS_PER_PAGE)
+with spans.span("render_cards", rows_in=min(shown, len(cards))):
+    render_token_cards(cards[:shown])
+if shown < len(cards):
+    if st.button(f"Show more tokens ({len(cards) - shown} left)"):
+        st.session_state["cards_shown"] = shown + CARDS_PER_PAGE
+        st.rerun()
+
+#--PERFORMANCE PANEL (?perf=1)
+if st.query_params.get("perf"):
+    with st.sidebar.expander("Performance", expanded=True):
+        st.dataframe(spans.run_frame(), hide_index=True)
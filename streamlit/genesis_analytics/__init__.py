@@ -0,0 +1 @@
+"""Shared data loading and sniper analytics for the Genesis dashboards."""
@@ -0,0 +1,165 @@
+"""Headless batch run of the sniper pipeline, for cron jobs and backfills.
+
+    python -m genesis_analytics.batch [TOKEN ...] [--from-block N] [--to-block N]
+                                      [--output FILE.parquet|.csv|.json] [--format parquet|csv|json]
+                                      [--mongo-url URL | --offline | --synthetic SWAPS] [--processes N]
+
+Runs the global snipers page's stages (load -> launch blocks -> detect -> pnl, through
+`engine.run`) over every discovered token or the ones given. A block range keeps only the
+swaps inside it, so PnL covers the trades of that range and unrealized PnL uses the last
+price in it. The table is written atomically, in the format of the output's extension
+unless --format says otherwise; without --output it is printed.
+
+Swaps come from:
+
+    (default)     MONGO_URL, with the local Parquet mirror seeding the load
+    --mongo-url   another server, e.g. a local mongod restored from a dump
+    --offline     the Parquet mirror alone, served in-process; no network at all
+    --synthetic   generated swaps (see `synthetic`), to smoke-test the job itself
+
+The run ends with one JSON summary line (status, rows, output, seconds per stage); with
+PERF_LOG=1 every stage also logs a JSON span line. Exit codes:
+
+    0  table written
+    1  the run failed
+    2  bad arguments
+    3  no swaps matched; nothing written
+"""
+import argparse
+import json
+import os
+import time
+import traceback
+
+import pandas as pd
+
+from genesis_analytics import engine, spans, synthetic
+from genesis_analytics.mirror import DEFAULT_MIRROR_DIR, SwapMirror
+from genesis_analytics.parallel import PIPELINE_PROCESSES
+from genesis_analytics.swaps import LOAD_WORKERS
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_NO_DATA = 3  # 2 is argparse's exit code for bad arguments
+
+FORMATS = {".parquet": "parquet", ".csv": "csv", ".json": "json"}
+
+
+def output_format(path, fmt=None):
+    """The explicit format, else the one of the path's extension (None when neither says)"""
+    return fmt or FORMATS.get(os.path.splitext(path or "")[1].lower())
+
+
+def write_table(df, path, fmt):
+    """Write the table through a temporary file, so a reader never sees a partial one"""
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        df.to_parquet(tmp, index=False)
+    elif fmt == "csv":
+        df.to_csv(tmp, index=False)
+    else:
+        df.to_json(tmp, orient="records", date_format="iso")
+    os.replace(tmp, path)
+
+
+def offline_database(mirror, tokens=None, min_block=None, max_block=None):
+    """Stand-in swap database over the given mirrored tokens (all of them by default).
+
+    The mirror has no `Personas`, so each token's launch block is its first mirrored swap,
+    taken before the block range is applied.
+    """
+    tokens = [token.upper() for token in tokens] if tokens else mirror.tokens()
+    swaps, launch_blocks = {}, {}
+    for token in tokens:
+        df = mirror.read(token, min_block=min_block, max_block=max_block)
+        if df is None:
+            print(f"{token} is not in the mirror at {mirror.root}, skipping")
+            continue
+        swaps[token] = df
+        first = pd.to_numeric(mirror.read(token, columns=["blockNumber"])["blockNumber"], errors="coerce").min()
+        if pd.notna(first):
+            launch_blocks[token] = int(first)
+    return synthetic.FrameDatabase(swaps, launch_blocks)
+
+
+def synthetic_database(total_swaps, tokens=20, seed=0):
+    swaps, launch_blocks = synthetic.generate(tokens, max(total_swaps // tokens, 1), max(200, total_swaps // 50),
+                                              seed=seed)
+    return synthetic.FrameDatabase(swaps, launch_blocks)
+
+
+def source(args):
+    """(database, mirror) the run reads from"""
+    if args.offline:
+        return offline_database(SwapMirror(args.mirror_root), args.tokens, args.from_block, args.to_block), None
+    if args.synthetic:
+        from genesis_analytics.bench import parse_size
+
+        return synthetic_database(parse_size(args.synthetic), args.synthetic_tokens, args.seed), None
+    if args.mongo_url:
+        os.environ["MONGO_URL"] = os.environ["MongoLink"] = args.mongo_url  # overrides either name from .env
+    from genesis_analytics.db import swap_db
+
+    return swap_db(), SwapMirror(args.mirror_root)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detect snipers and export their PnL without the dashboard")
+    parser.add_argument("tokens", nargs="*", help="token symbols (default: every discovered swap collection)")
+    parser.add_argument("--from-block", type=int, help="first block of the range (inclusive)")
+    parser.add_argument("--to-block", type=int, help="last block of the range (inclusive)")
+    parser.add_argument("--output", help="write the table to this file instead of printing it")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())), help="default: from the output's extension")
+    parser.add_argument("--workers", type=int, default=LOAD_WORKERS, help="collections loaded at once")
+    parser.add_argument("--processes", type=int, default=PIPELINE_PROCESSES,
+                        help="processes for detection and PnL on large frames (see parallel)")
+    parser.add_argument("--mirror-root", default=DEFAULT_MIRROR_DIR, help="Parquet mirror directory")
+    sources = parser.add_mutually_exclusive_group()
+    sources.add_argument("--mongo-url", help="read from this server instead of MONGO_URL")
+    sources.add_argument("--offline", action="store_true", help="read only the Parquet mirror")
+    sources.add_argument("--synthetic", metavar="SWAPS", help="run on generated swaps, e.g. 100k")
+    parser.add_argument("--synthetic-tokens", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.from_block is not None and args.to_block is not None and args.from_block > args.to_block:
+        parser.error("--from-block is after --to-block")
+    args.format = output_format(args.output, args.format)
+    if args.output and args.format is None:
+        parser.error(f"cannot tell the format of {args.output}; use --format")
+    return args
+
+
+def main(argv=None):
+    """Run the pipeline once; returns the exit code"""
+    args = parse_args(argv)
+    spans.start_run("batch")
+    start = time.perf_counter()
+    summary = {"event": "batch", "tokens": args.tokens or "all", "from_block": args.from_block,
+               "to_block": args.to_block, "output": args.output}
+    try:
+        db, mirror = source(args)
+        pnl_df = engine.run(db, args.tokens, mirror=mirror, max_workers=args.workers,
+                            min_block=args.from_block, max_block=args.to_block, processes=args.processes)
+        if pnl_df is None:
+            print("No data found from MongoDB collections.")
+            summary["status"], code = "no_data", EXIT_NO_DATA
+        else:
+            with spans.span("write", rows_in=len(pnl_df)):
+                if args.output:
+                    write_table(pnl_df, args.output, args.format)
+                else:
+                    print(pnl_df.to_string(index=False))
+            summary.update(status="ok", rows=len(pnl_df))
+            code = EXIT_OK
+    except Exception:
+        traceback.print_exc()
+        summary["status"], code = "failed", EXIT_FAILED
+    summary["stages"] = {record["stage"]: record["seconds"] for record in spans.run_records() if record["depth"] == 0}
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    print(json.dumps(summary, default=str))
+    return code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
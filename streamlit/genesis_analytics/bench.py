@@ -0,0 +1,128 @@
+"""Offline benchmarks of the sniper pipeline stages on synthetic swaps.
+
+    python -m genesis_analytics.bench [--sizes 10k 1m 10m] [--tokens 20] [--backend frames|mongomock]
+                                      [--processes N] [--output FILE.csv]
+
+For every size, synthetic swaps (see `synthetic`) are served by an in-process stand-in and
+each stage the dashboards run is timed:
+
+    load        documents -> combined frame through IncrementalSwapStore (the page's load_swap_data)
+    refresh     the same store refreshed again with nothing new ingested
+    detect      engine.detect (the page's process_sniper_data)
+    pnl         engine.pnl (the page's calculate_pnl)
+
+Each stage is timed on its own, then run again under tracemalloc for its peak memory.
+The frames backend skips the document store, so `load` measures everything but the
+network; mongomock is closer to pymongo but only practical up to about 100k swaps.
+With --processes above 1, detect and pnl run on the process pool (see `parallel`) for
+sizes past PARALLEL_MIN_ROWS; the pool is started before timing begins.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import pandas as pd
+
+from genesis_analytics import engine, parallel, spans, synthetic
+from genesis_analytics.swaps import IncrementalSwapStore
+
+SIZES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(text):
+    text = text.lower().replace("_", "")
+    if text[-1] in SIZES:
+        return int(float(text[:-1]) * SIZES[text[-1]])
+    return int(text)
+
+
+def _measure(fn):
+    """(result, seconds, peak MB) of one untraced run followed by a traced one"""
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak / 2 ** 20
+
+
+def build_database(backend, swaps, launch_blocks):
+    if backend == "frames":
+        return synthetic.FrameDatabase(swaps, launch_blocks)
+    import mongomock  # only needed for this backend
+
+    db = mongomock.MongoClient()["genesis_tokens_swap_info"]
+    synthetic.populate(db, swaps, launch_blocks)
+    return db
+
+
+def bench_size(total_swaps, tokens=20, makers=None, sniper_fraction=0.02, backend="frames", seed=0, processes=1):
+    """One row per stage with rows out, seconds and peak MB for `total_swaps` swaps over `tokens` tokens"""
+    per_token = max(total_swaps // tokens, 1)
+    makers = makers or max(200, total_swaps // 50)
+    start = time.perf_counter()
+    swaps, launch_blocks = synthetic.generate(tokens, per_token, makers, sniper_fraction=sniper_fraction, seed=seed)
+    db = build_database(backend, swaps, launch_blocks)
+    print(f"Generated {per_token * tokens} swaps over {tokens} tokens and {makers} makers "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    def fresh_store():
+        return IncrementalSwapStore(db)
+
+    rows = []
+
+    def record(stage, fn):
+        result, seconds, peak = _measure(fn)
+        rows.append({"swaps": per_token * tokens, "stage": stage, "rows": 0 if result is None else len(result),
+                     "seconds": round(seconds, 4), "peak_mb": round(peak, 1)})
+        return result
+
+    def load():
+        store = fresh_store()
+        return store, store.refresh()
+
+    store, combined_df = load()
+    record("load", lambda: load()[1])
+    record("refresh", store.refresh)
+    token_launch_blocks = engine.launch_blocks(db, combined_df)
+    if parallel.use_pool(combined_df, processes):
+        parallel.warm_up(processes)
+    snipers = record("detect", lambda: engine.detect(combined_df, token_launch_blocks, processes=processes))
+    record("pnl", lambda: engine.pnl(snipers, combined_df, latest_prices=store.latest_prices, processes=processes))
+    return pd.DataFrame(rows, columns=["swaps", "stage", "rows", "seconds", "peak_mb"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sniper pipeline stages on synthetic swaps")
+    parser.add_argument("--sizes", nargs="+", default=["10k", "1m", "10m"], help="total swaps per run, e.g. 10k 1m")
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--makers", type=int, help="maker pool size (default: one per 50 swaps)")
+    parser.add_argument("--sniper-fraction", type=float, default=0.02)
+    parser.add_argument("--backend", choices=["frames", "mongomock"], default="frames")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=1, help="processes for detect and pnl (see parallel)")
+    parser.add_argument("--output", help="also write the results to this CSV file")
+    args = parser.parse_args(argv)
+
+    spans.LOG = False  # the stages run twice each; the report below replaces the span lines
+    results = []
+    for size in args.sizes:
+        report = bench_size(parse_size(size), args.tokens, args.makers, args.sniper_fraction, args.backend,
+                            args.seed, args.processes)
+        print(report.to_string(index=False))
+        results.append(report)
+    results = pd.concat(results, ignore_index=True)
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
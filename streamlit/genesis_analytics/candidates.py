@@ -0,0 +1,118 @@
+"""Server-side sniper candidate selection.
+
+Instead of pulling every swap into pandas, each `<token>_swap` collection runs an aggregation
+that keeps only makers who could pass the sniper rules:
+
+  * at least one buy within `LAUNCH_BLOCK_WINDOW` blocks of launch paying more than
+    `MIN_TRANSACTION_FEE`, and
+  * more than `LARGE_BUY_THRESHOLD` bought in total up to `BURST_WINDOW` after the last
+    swap of the launch window (no burst containing a launch-window buy can reach later).
+
+Both are necessary conditions, so the candidate set is a superset of the real snipers and
+running `detect_snipers` / the PnL engine on the candidates' swaps gives the same result as
+on the full collections. Only the candidates' swaps and one latest-price row per token
+cross the network.
+
+Numeric fields are read through `$convert`, since `normalize_swaps` parses numbers stored
+as strings and a plain `$sum` or comparison would skip them; anything unparseable counts
+as 0 (amounts) or is let through (blocks, fees, times), which keeps the superset.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from genesis_analytics import spans
+from genesis_analytics.detection import BURST_WINDOW, LARGE_BUY_THRESHOLD, LAUNCH_BLOCK_WINDOW, MIN_TRANSACTION_FEE
+from genesis_analytics.prices import LatestPriceIndex
+from genesis_analytics.schema import concat_swaps
+from genesis_analytics.swaps import (LOAD_WORKERS, SWAP_COLUMNS, discover_swap_collections, finalize_swaps,
+                                     normalize_swaps, swap_projection)
+
+# Rows the pandas path drops in finalize_swaps never count towards a candidate
+PRICED_SWAP = {"transactionFee": {"$ne": None}, "genesis_usdc_price": {"$ne": None}}
+
+
+def _number(field, default=None):
+    """`field` as a double, with numeric strings parsed; `default` when missing or unparseable"""
+    return {"$convert": {"input": f"${field}", "to": "double", "onError": default, "onNull": default}}
+
+
+def candidate_pipeline(token_prefix, launch_block, window_end_ts):
+    """Aggregation returning the makers of one collection that may be snipers"""
+    return [
+        {"$match": {
+            **PRICED_SWAP,
+            "swapType": "buy",
+            # A time stored as text is kept, like a missing one; the pandas side parses it
+            "$or": [{"timestamp": {"$lte": window_end_ts + BURST_WINDOW.total_seconds()}}, {"timestamp": None},
+                    {"timestamp": {"$type": "string"}}],
+        }},
+        {"$group": {
+            "_id": "$maker",
+            "total_out": {"$sum": _number(f"{token_prefix}OUT_BeforeTax", 0)},
+            "launch_gas_buys": {"$sum": {"$cond": [
+                {"$and": [
+                    # null (unparseable) sorts below every number, so such a block counts as in the window
+                    {"$lte": [_number("blockNumber"), launch_block + LAUNCH_BLOCK_WINDOW]},
+                    {"$gt": [_number("transactionFee", float("inf")), MIN_TRANSACTION_FEE]},
+                ]}, 1, 0]}},
+        }},
+        {"$match": {"launch_gas_buys": {"$gt": 0}, "total_out": {"$gt": LARGE_BUY_THRESHOLD}}},
+    ]
+
+
+def candidate_makers(db, col_name, launch_block):
+    """Makers of one collection passing the server-side candidate filters"""
+    token_prefix = col_name.replace('_swap', '').upper() + "_"
+    last_launch_swap = db[col_name].find_one(
+        {"blockNumber": {"$lte": launch_block + LAUNCH_BLOCK_WINDOW}, "timestamp": {"$ne": None}},
+        {"timestamp": 1}, sort=[("timestamp", -1)]
+    )
+    if last_launch_swap is None:
+        return []
+    pipeline = candidate_pipeline(token_prefix, launch_block, last_launch_swap["timestamp"])
+    return [doc["_id"] for doc in db[col_name].aggregate(pipeline) if doc["_id"] is not None]
+
+
+def _load_collection(db, col_name, launch_block):
+    start = time.perf_counter()
+    token_name = col_name.replace('_swap', '')
+    latest = db[col_name].find_one(
+        PRICED_SWAP, {"token_name": 1, "timestamp": 1, "blockNumber": 1, "genesis_usdc_price": 1},
+        sort=[("timestamp", -1)]
+    )
+    makers = candidate_makers(db, col_name, launch_block) if launch_block is not None else []
+    df = None
+    if makers:
+        data = list(db[col_name].find({"maker": {"$in": makers}}, swap_projection(token_name.upper() + "_")))
+        df = finalize_swaps(normalize_swaps(data, token_name, SWAP_COLUMNS)) if data else None
+    stats = {
+        "collection": col_name,
+        "candidates": len(makers),
+        "rows_fetched": 0 if df is None else len(df),
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+    if latest is not None:
+        latest["token_name"] = token_name.upper()
+    return df, latest, stats
+
+
+def load_candidate_swaps(db, token_launch_blocks, collections=None, max_workers=LOAD_WORKERS):
+    """Return the candidate makers' swaps, a LatestPriceIndex over the full collections and per-collection stats"""
+    if collections is None:
+        collections = discover_swap_collections(db)
+
+    def load(col_name):
+        launch_block = token_launch_blocks.get(col_name.replace('_swap', '').upper())
+        launch_block = None if pd.isna(launch_block) else int(launch_block)
+        return _load_collection(db, col_name, launch_block)
+
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=spans.join_run,
+                            initargs=(spans.current_run(),)) as pool:
+        results = list(pool.map(load, collections))
+
+    frames = [df for df, _, _ in results if df is not None]
+    combined_df = concat_swaps(frames)
+    latest_prices = LatestPriceIndex.from_frame(pd.DataFrame([latest for _, latest, _ in results if latest is not None]))
+    return combined_df, latest_prices, pd.DataFrame([stats for _, _, stats in results])
@@ -0,0 +1,23 @@
+"""Data for the token cards of the landing page."""
+
+PERSONA_COLLECTION = "New Persona"
+
+CARDS_PIPELINE = [
+    {"$match": {"symbol": {"$ne": None}}},
+    {"$sort": {"_id": 1}},  # names keep their insertion order within a card
+    {"$group": {"_id": "$symbol", "names": {"$push": "$name"}}},
+    {"$sort": {"_id": 1}},
+]
+
+
+def token_cards(db):
+    """One entry per token symbol with every persona name using it, sorted by symbol, from a single aggregation"""
+    return [{"symbol": doc["_id"], "names": [name for name in doc["names"] if name is not None]}
+            for doc in db[PERSONA_COLLECTION].aggregate(CARDS_PIPELINE)]
+
+
+def cards_version(db):
+    """Cheap fingerprint of the persona collection; changes whenever a persona is added or removed"""
+    collection = db[PERSONA_COLLECTION]
+    last = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    return collection.estimated_document_count(), None if last is None else str(last["_id"])
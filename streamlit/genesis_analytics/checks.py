@@ -0,0 +1,379 @@
+"""Equivalence checks of the vectorized stages against the loops they replaced.
+
+    python -m genesis_analytics.checks [bursts] [fifo] [parallel] [candidates] [transactions] [--seeds 5]
+
+Each check runs the current implementation and a reference copy of the old per-row loop
+on randomized swap frames and asserts the results are exactly equal:
+
+    bursts      detection.find_large_buy_bursts against the itertuples chunking loop, on
+                frames with NaN amounts, NaT times and missing makers, with fewer and with
+                more (maker, token) groups than detection._SCALAR_TAIL
+    fifo        pnl.pair_results (fifo_pnl and pair_stats) against the per-pair deque loops
+                of the global pages (skipping invalid trades) and of the token page, with
+                zero and NaN prices and NaN amounts; times are unique per frame, since the
+                old per-pair sort did not order ties, and no lot is empty (the old loop
+                raised ZeroDivisionError on one)
+    parallel    parallel.detect_snipers and parallel.pair_results against the serial stages
+                on 2 and 3 processes, and (on Linux) that the shared memory they use is
+                freed again: /proc/meminfo's Shmem ends within SHMEM_SLACK_MB of where it
+                started
+    candidates  candidates.load_candidate_swaps against the full load, through detection
+                and the sniper PnL, on synthetic collections in mongomock where part of the
+                buy amounts (the snipers' burst buys among them) are stored as strings
+    transactions
+                transactions.MongoTransactionSource against filters.TransactionFilterEngine
+                on one synthetic token in mongomock, some amounts stored as strings: every
+                page sorted by tx_value both ways, the bounds of the derived fields, and
+                the rows of a tx_value range
+
+mongomock lacks `$convert` and `$round`; the checks using it add both for the run.
+
+A mismatch raises AssertionError (exit code 1); every passing run prints one line.
+"""
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from genesis_analytics import detection, engine, parallel, spans, synthetic
+from genesis_analytics.candidates import load_candidate_swaps
+from genesis_analytics.filters import TransactionFilterEngine
+from genesis_analytics.detection import BURST_WINDOW, LARGE_BUY_THRESHOLD, find_large_buy_bursts
+from genesis_analytics.pnl import PAIR_COLS, pair_results, sniper_pnl_summary
+from genesis_analytics.swaps import IncrementalSwapStore
+from genesis_analytics.transactions import DERIVED_FIELDS, PAGE_SIZES, MongoTransactionSource
+
+START = pd.Timestamp("2025-01-01")
+SHMEM_SLACK_MB = 16  # other processes on the machine move Shmem a little too
+
+
+def random_swaps(n, tokens=3, makers=200, seconds=3 * 3600, missing=True, seed=0):
+    """Normalized swaps (unprefixed amounts, datetime times) with ties and, optionally, gaps.
+
+    With `missing`, about 1% of buy amounts are NaN and 0.5% of times and makers are missing.
+    About 2% of prices are zero and 0.5% NaN.
+    """
+    rng = np.random.default_rng(seed)
+    ts = START + pd.to_timedelta(rng.integers(0, seconds, n), unit="s")
+    df = pd.DataFrame({
+        "maker": rng.choice([f"0x{i:040x}" for i in range(makers)], n).astype(object),
+        "token_name": rng.choice([f"TOK{i}" for i in range(tokens)], n).astype(object),
+        "swapType": rng.choice(["buy", "sell"], n),
+        "timestampReadable": ts,
+        "timestamp": np.asarray(ts.astype("int64") // 10 ** 9),
+        "blockNumber": 1_000 + np.asarray((ts - START).total_seconds(), dtype=np.int64) // 2,
+        "OUT_BeforeTax": rng.exponential(40_000, n),
+        "transactionFee": rng.choice([0.000001, 0.00001], n),
+    })
+    if missing:
+        df.loc[rng.random(n) < 0.01, "OUT_BeforeTax"] = np.nan
+        df.loc[rng.random(n) < 0.005, "timestampReadable"] = pd.NaT
+        df.loc[rng.random(n) < 0.005, "maker"] = None
+    df["OUT_AfterTax"] = df["OUT_BeforeTax"] * 0.99
+    df["IN_BeforeTax"] = rng.exponential(40_000, n)
+    df["IN_AfterTax"] = df["IN_BeforeTax"] * 0.99
+    df["genesis_usdc_price"] = np.where(rng.random(n) < 0.02, 0.0, rng.uniform(0, 0.01, n))
+    df["Tax_1pct"] = rng.uniform(0, 1, n)
+    if missing:
+        df.loc[rng.random(n) < 0.005, "genesis_usdc_price"] = np.nan
+    return df
+
+
+def reference_large_buy_bursts(buy_df, amount_col="OUT_BeforeTax", group_cols=("maker", "token_name"),
+                               time_col="timestampReadable", window=BURST_WINDOW, threshold=LARGE_BUY_THRESHOLD):
+    """The itertuples chunking loop `find_large_buy_bursts` replaced, with its column names as arguments"""
+    group_cols = list(group_cols)
+    buy_df = buy_df.sort_values(by=group_cols + [time_col])
+    chunked_buys = []
+    for _, group in buy_df.groupby(group_cols):
+        current_chunk = []
+        current_sum = 0
+        chunk_start_time = None
+        for row in group.itertuples():
+            row_time, amount = getattr(row, time_col), getattr(row, amount_col)
+            if not current_chunk:
+                chunk_start_time = row_time
+                current_chunk = [row]
+                current_sum = amount
+            elif row_time - chunk_start_time <= window:
+                current_chunk.append(row)
+                current_sum += amount
+            else:
+                if current_sum > threshold:
+                    chunked_buys.extend(current_chunk)
+                chunk_start_time = row_time
+                current_chunk = [row]
+                current_sum = amount
+        if current_sum > threshold:
+            chunked_buys.extend(current_chunk)
+    return pd.DataFrame(chunked_buys).drop_duplicates()
+
+
+def check_bursts(seed):
+    """find_large_buy_bursts keeps the same rows, in the same order, as the old loop"""
+    cases = [
+        ("few groups", dict(tokens=2, makers=5)),  # below _SCALAR_TAIL: the scalar walk only
+        ("many groups", dict(tokens=3, makers=600)),  # above it: batched jumps, then the scalar tail
+        ("per token", dict(tokens=1, makers=300)),  # the token page groups by maker alone
+    ]
+    for name, sizes in cases:
+        buy_df = random_swaps(20_000, seed=seed, **sizes)
+        buy_df = buy_df[buy_df["swapType"] == "buy"]
+        group_cols = ("maker",) if sizes["tokens"] == 1 else ("maker", "token_name")
+        groups = buy_df[list(group_cols)].dropna().drop_duplicates()
+        assert (len(groups) > detection._SCALAR_TAIL) == (sizes["makers"] > 100), f"{name}: wrong group count"
+
+        expected = reference_large_buy_bursts(buy_df, group_cols=group_cols)
+        result = find_large_buy_bursts(buy_df, group_cols=group_cols)
+        assert 0 < len(result) < len(buy_df), f"{name}: the threshold should keep some buys and drop others"
+        assert result["Index"].tolist() == expected["Index"].tolist(), f"{name} (seed {seed}): rows differ"
+        pd.testing.assert_frame_equal(result.drop(columns="Index"),
+                                      buy_df.loc[expected["Index"]].reset_index(drop=True), check_exact=True)
+        print(f"bursts seed {seed} {name}: {len(result)} of {len(buy_df)} buys match")
+
+
+def reference_pair_pnl(df, skip_invalid=True):
+    """Trade stats and FIFO PnL of one (maker, token) pair as the old per-pair loops computed them.
+
+    `skip_invalid` follows the global pages (trades without a positive price or amount are
+    ignored); without it, the token page's loop, which matches every trade.
+    """
+    df = df.sort_values(by="timestamp")
+    buys, sells = df["swapType"] == "buy", df["swapType"] == "sell"
+    stats = {
+        "buy_txn_count": buys.sum(),
+        "sell_txn_count": sells.sum(),
+        "first_buy_time": df.loc[buys, "timestampReadable"].min(),
+        "last_sell_time": df.loc[sells, "timestampReadable"].max(),
+        "avg_buy_price": df.loc[buys, "genesis_usdc_price"].mean(),
+        "avg_sell_price": df.loc[sells, "genesis_usdc_price"].mean(),
+        "total_tax_paid": df["Tax_1pct"].sum(),
+        "total_transaction_fee_paid": df["transactionFee"].sum(),
+    }
+
+    def value(doc, col):
+        # The global loop read missing values as 0 through `or 0`; the token page used them as they were
+        return float(doc.get(col, 0) or 0) if skip_invalid else doc.get(col, 0.0)
+
+    trades = []  # (type, amount sold or received, from wallet or paid for, price)
+    for _, doc in df.iterrows():
+        price = value(doc, "genesis_usdc_price")
+        if doc["swapType"] == "buy":
+            trade, checked = ("buy", value(doc, "OUT_AfterTax"), value(doc, "OUT_BeforeTax"), price), "OUT_BeforeTax"
+        elif doc["swapType"] == "sell":
+            trade, checked = ("sell", value(doc, "IN_AfterTax"), value(doc, "IN_BeforeTax"), price), "IN_AfterTax"
+        else:
+            continue
+        if skip_invalid and (price <= 0 or value(doc, checked) <= 0):
+            continue
+        trades.append(trade)
+
+    realized = 0.0
+    buy_queue = deque()
+    for kind, amount, other, price in trades:
+        if kind == "buy":
+            buy_queue.append({"amount": amount, "paid": other, "price": price})
+            continue
+        from_wallet = remaining_to_match = other
+        while remaining_to_match > 0 and buy_queue:
+            buy = buy_queue.popleft()
+            matched = min(remaining_to_match, buy["amount"])
+            matched_paid = buy["paid"] * (matched / buy["amount"])
+            realized += amount * price * (matched / from_wallet) - matched_paid * buy["price"]
+            remaining_to_match -= matched
+            left = buy["amount"] - matched
+            if left > 0:
+                buy_queue.appendleft({"amount": left, "paid": buy["paid"] * (left / buy["amount"]), "price": buy["price"]})
+    return {"realized_pnl": realized, "remaining_tokens": sum(b["amount"] for b in buy_queue), **stats}
+
+
+def check_fifo(seed):
+    """pair_results gives the old loops' figures, bit for bit, for both pages' rules"""
+    cases = [(f"{page}{gaps}", skip_invalid, bool(gaps))
+             for page, skip_invalid in [("global", True), ("token page", False)] for gaps in ["", " with gaps"]]
+    for name, skip_invalid, missing in cases:
+        # Without gaps most pairs end with finite PnL; with them NaN spreads through a pair's lots
+        df = random_swaps(30_000, makers=60, missing=missing, seed=seed)
+        df["timestamp"] = 1_700_000_000 + np.random.default_rng(seed).permutation(len(df))
+        potential = df[df["maker"].notna()].sample(300, random_state=seed)
+        result = pair_results(potential, df, skip_invalid=skip_invalid)
+        pairs = potential[PAIR_COLS].drop_duplicates()
+        assert result[PAIR_COLS].reset_index(drop=True).equals(pairs.reset_index(drop=True)), f"{name}: pair order"
+        expected = pd.DataFrame([
+            reference_pair_pnl(df[(df["maker"] == maker) & (df["token_name"] == token)], skip_invalid)
+            for maker, token in pairs.itertuples(index=False)
+        ])
+        compared = result[expected.columns].astype({"buy_txn_count": "int64", "sell_txn_count": "int64"})
+        pd.testing.assert_frame_equal(compared, expected.astype(compared.dtypes.to_dict()), check_exact=True,
+                                      obj=f"{name} pair results (seed {seed})")
+        finite = int(np.isfinite(result["realized_pnl"]).sum())
+        print(f"fifo seed {seed} {name}: {len(result)} pairs match ({finite} with finite PnL)")
+
+
+def shmem_mb():
+    """Shared memory in use on the machine (MB), None where /proc/meminfo is missing"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("Shmem:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def check_parallel(seed):
+    """The process pool gives the serial tables and leaves no shared memory behind"""
+    swaps, launch_blocks = synthetic.generate(20, 20_000, 8_000, seed=seed)
+    db = synthetic.FrameDatabase(swaps, launch_blocks)
+    combined_df = IncrementalSwapStore(db).refresh()
+    token_launch_blocks = engine.launch_blocks(db, combined_df)
+    snipers = detection.detect_snipers(combined_df, token_launch_blocks).reset_index(drop=True)
+    expected = {view: pair_results(snipers, combined_df, **options) for view, options in engine.PAIR_OPTIONS.items()}
+
+    for processes in (2, 3):
+        parallel.warm_up(processes)
+        baseline = shmem_mb()
+        result = parallel.detect_snipers(combined_df, token_launch_blocks, processes)
+        pd.testing.assert_frame_equal(result.drop(columns="Index"), snipers.drop(columns="Index"), check_exact=True)
+        assert result["Index"].tolist() == snipers["Index"].tolist(), f"{processes} processes: sniper rows differ"
+        for view, options in engine.PAIR_OPTIONS.items():
+            pd.testing.assert_frame_equal(parallel.pair_results(snipers, combined_df, processes, **options),
+                                          expected[view], check_exact=True, obj=f"{view} pairs, {processes} processes")
+        held = None if baseline is None else shmem_mb() - baseline
+        assert held is None or held < SHMEM_SLACK_MB, f"{processes} processes: {held:.0f} MB of shared memory still held"
+        shared = "not measured" if held is None else f"shared memory {held:+.1f} MB"
+        print(f"parallel seed {seed} {processes} processes: {len(result)} snipers and both PnL views match, {shared}")
+
+
+def mongomock_database():
+    """A mongomock database whose aggregations also understand `$convert` to double and `$round`"""
+    import mongomock
+    from mongomock import aggregate
+
+    parser = aggregate._Parser
+    if "$round" in aggregate.arithmetic_operators:
+        return mongomock.MongoClient()["genesis"]
+    convert_type, arithmetic = parser._handle_type_convertion_operator, parser._handle_arithmetic_operator
+
+    def convert(self, operator, values):
+        if operator != "$convert":
+            return convert_type(self, operator, values)
+        assert values.get("to") == "double", f"$convert to {values.get('to')} is not emulated"
+        try:
+            value = self.parse(values["input"])
+        except KeyError:
+            value = None
+        if value is None:
+            return values.get("onNull")
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return values.get("onError")
+
+    def round_(self, operator, values):
+        if operator != "$round":
+            return arithmetic(self, operator, values)
+        number, places = self.parse_many(values)
+        return None if number is None else round(number, places)
+
+    parser._handle_type_convertion_operator = convert
+    parser._handle_arithmetic_operator = round_
+    aggregate.arithmetic_operators = {*aggregate.arithmetic_operators, "$round"}
+    return mongomock.MongoClient()["genesis"]
+
+
+def check_candidates(seed):
+    """The candidate load finds the full load's snipers and PnL, with amounts stored as strings"""
+    swaps, launch_blocks = synthetic.generate(3, 3_000, 300, seed=seed)
+    rng = np.random.default_rng(seed)
+    stringified = 0
+    for symbol, df in swaps.items():
+        column = f"{symbol}_OUT_BeforeTax"
+        burst = df["blockNumber"] < launch_blocks[symbol] + detection.LAUNCH_BLOCK_WINDOW
+        as_text = df[column].notna() & (burst | (rng.random(len(df)) < 0.2)) & (rng.random(len(df)) < 0.5)
+        df[column] = df[column].astype(object)
+        df.loc[as_text, column] = df.loc[as_text, column].map(repr)
+        stringified += int(as_text.sum())
+    db = mongomock_database()
+    synthetic.populate(db, swaps, launch_blocks)
+
+    store = IncrementalSwapStore(db)
+    full_df = store.refresh()
+    expected = sniper_pnl_summary(detection.detect_snipers(full_df, launch_blocks), full_df, store.latest_prices)
+    candidate_df, latest_prices, _ = load_candidate_swaps(db, launch_blocks)
+    result = sniper_pnl_summary(detection.detect_snipers(candidate_df, launch_blocks), candidate_df, latest_prices)
+
+    assert len(expected), f"seed {seed}: no snipers to compare"
+    order = ["Token", "Sniper Wallet Address"]
+    pd.testing.assert_frame_equal(result.sort_values(order).reset_index(drop=True),
+                                  expected.sort_values(order).reset_index(drop=True), obj=f"candidate PnL (seed {seed})")
+    print(f"candidates seed {seed}: {len(result)} snipers match from {len(candidate_df)} of {len(full_df)} swaps "
+          f"({stringified} amounts stored as strings)")
+
+
+def all_pages(source, sort_field, ascending, **range_filter):
+    """Every page of a transaction source joined, following its cursors"""
+    pages, after = [], None
+    while True:
+        page, after = source.page({}, sort_field, ascending, PAGE_SIZES[-1], after, **range_filter)
+        pages.append(page)
+        if after is None:
+            return pd.concat(pages, ignore_index=True)
+
+
+def check_transactions(seed):
+    """The Mongo transaction table pages, bounds and ranges as the in-memory engine does"""
+    swaps, launch_blocks = synthetic.generate(1, 2_000, 200, seed=seed)
+    (symbol, df), = swaps.items()
+    rng = np.random.default_rng(seed)
+    for column in [f"{symbol}_OUT", f"{symbol}_IN"]:
+        as_text = df[column].notna() & (rng.random(len(df)) < 0.1)
+        df[column] = df[column].astype(object)
+        df.loc[as_text, column] = df.loc[as_text, column].map(repr)
+    db = mongomock_database()
+    synthetic.populate(db, swaps, launch_blocks)
+    mongo = MongoTransactionSource(db[f"{symbol.lower()}_swap"], symbol)
+    engine_source = TransactionFilterEngine.from_swaps(df, symbol)
+
+    for field in DERIVED_FIELDS:
+        bounds = mongo.value_bounds({}, field), engine_source.value_bounds({}, field)
+        assert bounds[0] == bounds[1], f"seed {seed}: {field} bounds {bounds[0]} from Mongo, {bounds[1]} in memory"
+    lo, hi = np.quantile(engine_source.table["tx_value"], [0.25, 0.75]).round(4).tolist()
+    cases = [("tx_value descending", False, {}), ("tx_value ascending", True, {}),
+             (f"tx_value in [{lo}, {hi}]", False, {"range_field": "tx_value", "value_range": (lo, hi)})]
+    for name, ascending, range_filter in cases:
+        expected = all_pages(engine_source, "tx_value", ascending, **range_filter)
+        result = all_pages(mongo, "tx_value", ascending, **range_filter)
+        assert result["txHash"].tolist() == expected["txHash"].tolist(), f"seed {seed} {name}: row order differs"
+        for field in DERIVED_FIELDS:
+            assert np.array_equal(result[field].to_numpy(float), expected[field].to_numpy(float)), \
+                f"seed {seed} {name}: {field} differs"
+        print(f"transactions seed {seed} {name}: {len(result)} rows in the same order with the same values")
+
+
+CHECKS = {"bursts": check_bursts, "fifo": check_fifo, "parallel": check_parallel, "candidates": check_candidates,
+          "transactions": check_transactions}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the vectorized stages against the loops they replaced")
+    parser.add_argument("checks", nargs="*", help="default: all")
+    parser.add_argument("--seeds", type=int, default=3, help="randomized frames per check")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.checks) - set(CHECKS))
+    if unknown:
+        parser.error(f"unknown checks {unknown}; choose from {list(CHECKS)}")
+
+    spans.LOG = False  # only the check lines are of interest
+
+    for name in args.checks or CHECKS:
+        start = time.perf_counter()
+        for seed in range(args.seeds):
+            CHECKS[name](seed)
+        print(f"{name}: ok in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
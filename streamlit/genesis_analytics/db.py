@@ -0,0 +1,96 @@
+"""Process-wide MongoDB access shared by every page and command.
+
+One pooled `MongoClient` is created per process on first use and reused by every page
+rerun, session and worker thread, so interactions no longer pay for a new connection
+handshake and pool warm-up. Configuration comes from the environment (and `.env`):
+
+    MONGO_URL (or MongoLink)             connection string
+    MONGO_MAX_POOL_SIZE                  default 50
+    MONGO_MIN_POOL_SIZE                  default 2
+    MONGO_MAX_IDLE_TIME_MS               default 300000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS    default 5000
+    MONGO_CONNECT_TIMEOUT_MS             default 5000
+    MONGO_SOCKET_TIMEOUT_MS              default 60000
+
+The global pages used to read MONGO_URL and the token pages and landing cards MongoLink.
+With one client for all of them, both names are accepted, but when both are set they must
+be the same string: `mongo_url` refuses to guess which server a deployment meant.
+
+The client reports every reply to `spans.MONGO_TRAFFIC`, so timing spans can show the
+documents and bytes each stage fetched.
+
+The query helpers below cover the lookups the pages used to write inline.
+"""
+import os
+import threading
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from genesis_analytics.spans import MONGO_TRAFFIC
+from genesis_analytics.swaps import SWAP_DB
+
+PERSONA_DB = "virtualgenesis"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client_options():
+    def setting(name, default):
+        return int(os.getenv(name, default))
+
+    return {
+        "maxPoolSize": setting("MONGO_MAX_POOL_SIZE", 50),
+        "minPoolSize": setting("MONGO_MIN_POOL_SIZE", 2),
+        "maxIdleTimeMS": setting("MONGO_MAX_IDLE_TIME_MS", 300000),
+        "serverSelectionTimeoutMS": setting("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": setting("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": setting("MONGO_SOCKET_TIMEOUT_MS", 60000),
+    }
+
+
+def mongo_url():
+    """The connection string from MONGO_URL or MongoLink; an error if they name different servers"""
+    load_dotenv()
+    url, link = os.getenv("MONGO_URL"), os.getenv("MongoLink")
+    if url and link and url != link:
+        raise RuntimeError("MONGO_URL and MongoLink are both set but differ. Every page now shares one "
+                           "client, so set only one of them, or set both to the same server.")
+    return url or link
+
+
+def get_client():
+    """The shared pooled client, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(mongo_url(), **client_options(),
+                                      event_listeners=[MONGO_TRAFFIC])
+    return _client
+
+
+def swap_db():
+    return get_client()[SWAP_DB]
+
+
+def persona_db():
+    return get_client()[PERSONA_DB]
+
+
+def token_progress(token):
+    """The `swap_progress` document of a token (addresses and genesis block), or None"""
+    return swap_db()["swap_progress"].find_one({"token_symbol": token.upper()})
+
+
+def first_swap(token):
+    """The earliest swap of a token, which carries its persona name, DAO and launch time"""
+    return swap_db()[f"{token.lower()}_swap"].find_one({"genesis_token_symbol": token.upper()}, sort=[("timestamp", 1)])
+
+
+def genesis_blocks():
+    """Token symbol -> genesis block from `swap_progress`"""
+    docs = swap_db()["swap_progress"].find({}, {"token_symbol": 1, "genesis_block": 1})
+    return {doc["token_symbol"]: doc["genesis_block"] for doc in docs
+            if "token_symbol" in doc and "genesis_block" in doc}
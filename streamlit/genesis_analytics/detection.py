@@ -0,0 +1,114 @@
+"""Sniper detection: large-buy bursts near launch followed by quick sells."""
+import numpy as np
+import pandas as pd
+
+BURST_WINDOW = pd.Timedelta(minutes=10)
+LARGE_BUY_THRESHOLD = 100000
+MIN_TRANSACTION_FEE = 0.000002
+LAUNCH_BLOCK_WINDOW = 100
+QUICK_SELL_SECONDS = 20 * 60
+
+# Once this few (maker, token) groups are still walking their chunks, finish them in plain Python
+_SCALAR_TAIL = 64
+
+
+def _chunk_starts(boundary, nxt):
+    """Mark chunk starts by following `nxt` from every group start until the next group begins"""
+    n = len(nxt)
+    is_start = np.zeros(n, dtype=bool)
+    stop = np.append(boundary, True)  # reaching a group start (or the end) closes the group
+    frontier = np.flatnonzero(boundary)
+    while len(frontier) > _SCALAR_TAIL:
+        is_start[frontier] = True
+        frontier = nxt[frontier]
+        frontier = frontier[~stop[frontier]]
+    nxt_list = nxt.tolist()
+    for s in frontier.tolist():
+        while True:
+            is_start[s] = True
+            s = nxt_list[s]
+            if stop[s]:
+                break
+    return is_start
+
+
+def find_large_buy_bursts(buy_df, amount_col="OUT_BeforeTax", group_cols=("maker", "token_name"),
+                          time_col="timestampReadable", window=BURST_WINDOW, threshold=LARGE_BUY_THRESHOLD):
+    """Return the buys that belong to a burst whose summed amount exceeds the threshold.
+
+    Within each group, sorted by time, a burst starts at the first buy and takes every buy
+    within `window` of that first buy; the next buy outside it starts a new burst. Rows come
+    back in (group, time) order with their original index in an `Index` column, the same
+    frame the previous itertuples loop produced.
+    """
+    group_cols = list(group_cols)
+    buy_df = buy_df.sort_values(by=group_cols + [time_col])
+    buy_df = buy_df[buy_df[group_cols].notna().all(axis=1)]  # groupby dropped rows with missing keys
+    n = len(buy_df)
+    if n == 0:
+        return buy_df.reset_index(names="Index")
+
+    keys = buy_df[group_cols]
+    boundary = keys.ne(keys.shift()).any(axis=1).to_numpy()
+    gid = np.cumsum(boundary) - 1
+
+    ts = buy_df[time_col].to_numpy().astype("datetime64[ns]")
+    nat = np.isnat(ts)
+    ts = ts.view("int64")
+    uniq = np.unique(ts[~nat])
+    width = len(uniq) + 1
+    rank = np.searchsorted(uniq, ts)
+    rank[nat] = len(uniq)  # NaT sorts last and never joins a burst
+    reach = np.searchsorted(uniq, ts + window.value, side="right")
+    key = gid * width + rank
+    nxt = np.searchsorted(key, gid * width + reach, side="left")
+    nxt[nat] = np.flatnonzero(nat) + 1
+    nxt = np.maximum(nxt, np.arange(1, n + 1))
+
+    is_start = _chunk_starts(boundary, nxt)
+    chunk_id = np.cumsum(is_start) - 1
+    if amount_col in buy_df.columns:
+        amounts = pd.to_numeric(buy_df[amount_col], errors="coerce").to_numpy(dtype=float)
+    else:
+        amounts = np.zeros(n)
+    sums = np.add.reduceat(amounts, np.flatnonzero(is_start))
+    mask = (sums > threshold)[chunk_id]
+    return buy_df[mask].reset_index(names="Index")
+
+
+def launch_window_buys(combined_df, token_launch_blocks, amount_col="OUT_BeforeTax", group_cols=("maker", "token_name")):
+    """Launch-window large buys, and the makers who sold a token within 20 minutes of buying it in one.
+
+    Everything here is worked out per (maker, token), so it can run on any partition of
+    the swaps that keeps those pairs whole; only the final maker filter of
+    `detect_snipers` looks across tokens.
+    """
+    buy_df = combined_df[combined_df['swapType'] == 'buy']
+    df_chunked_large_buys = find_large_buy_bursts(buy_df, amount_col=amount_col, group_cols=group_cols)
+    if 'transactionFee' in df_chunked_large_buys.columns:
+        df_high_gas = df_chunked_large_buys[df_chunked_large_buys['transactionFee'] > MIN_TRANSACTION_FEE]
+    else:
+        df_high_gas = df_chunked_large_buys
+
+    launch_blocks = pd.to_numeric(df_high_gas['token_name'].map(token_launch_blocks), errors='coerce')
+    df_sniper_buys = df_high_gas[df_high_gas['blockNumber'] <= launch_blocks + LAUNCH_BLOCK_WINDOW]
+
+    sells = combined_df[combined_df['swapType'] == 'sell'][['maker', 'timestampReadable', 'token_name']]
+
+    merged = pd.merge(
+        df_sniper_buys[['maker', 'timestampReadable', 'token_name']],
+        sells,
+        on=['maker', 'token_name'],
+        suffixes=('_buy', '_sell')
+    )
+
+    merged['time_diff'] = (merged['timestampReadable_sell'] - merged['timestampReadable_buy']).dt.total_seconds()
+    quick_sells = merged[merged['time_diff'].between(0, QUICK_SELL_SECONDS)]
+
+    return df_sniper_buys, quick_sells['maker']
+
+
+def detect_snipers(combined_df, token_launch_blocks, amount_col="OUT_BeforeTax", group_cols=("maker", "token_name")):
+    """Return the launch-window large buys of makers who also sold within 20 minutes"""
+    df_sniper_buys, quick_sellers = launch_window_buys(combined_df, token_launch_blocks, amount_col, group_cols)
+    return df_sniper_buys[df_sniper_buys['maker'].isin(quick_sellers)].copy()
@@ -0,0 +1,222 @@
+"""Sniper analytics pipeline without Streamlit: load -> detect -> pnl.
+
+    combined = engine.load(db)                            # every swap collection
+    snipers = engine.detect(combined, engine.launch_blocks(db, combined))
+    table = engine.pnl(snipers, combined)                 # one row per wallet and token
+
+`load_token` reads a single token for the token page, and `pnl(..., view="token")` gives
+that page's per-wallet table. The dashboards, the worker and the command line all go
+through these functions, so there is one implementation of each stage.
+
+Dashboards cache stage outputs under a data version (`VersionedPipeline.refresh`,
+`token_version`) instead of letting `st.cache_data` hash the frames passed in.
+
+Detection and PnL can run on a process pool split by token (`parallel`), set by the
+`processes` arguments or PIPELINE_PROCESSES; the default of 1 keeps them in-process.
+
+Every stage runs inside a timing span (see `spans`), so pages and commands log the same
+per-stage rows, seconds and Mongo traffic.
+
+Scheduled and backfill runs go through the `batch` command line (`python -m
+genesis_analytics.batch`); this module's own entry point runs the same command.
+"""
+import hashlib
+import threading
+
+import pandas as pd
+
+from genesis_analytics import parallel, spans
+from genesis_analytics.detection import detect_snipers
+from genesis_analytics.mirror import load_token_swaps
+from genesis_analytics.parallel import PIPELINE_PROCESSES
+from genesis_analytics.pnl import sniper_pnl_summary, token_pnl_summary
+from genesis_analytics.schema import compact_swaps, memory_report
+from genesis_analytics.swaps import LOAD_WORKERS, IncrementalSwapStore, load_launch_blocks, normalize_swaps
+
+VIEWS = {"sniper": sniper_pnl_summary, "token": token_pnl_summary}
+# FIFO options of each view, for pair results computed on the process pool
+PAIR_OPTIONS = {"sniper": {}, "token": {"skip_invalid": False}}
+
+
+def collections_for(tokens=None):
+    """Swap collections of the given tokens; None (discover them all) without tokens"""
+    return [f"{token.lower()}_swap" for token in tokens] if tokens else None
+
+
+def load(db, tokens=None, mirror=None, store=None, max_workers=LOAD_WORKERS, min_block=None, max_block=None):
+    """Combined swap frame of the given tokens (all discovered by default), None when there are no swaps.
+
+    Rows without fee or price are dropped and every token comes in the same unprefixed
+    schema; `min_block`/`max_block` keep only swaps in that block range. Pass a resident
+    `IncrementalSwapStore` to only fetch what changed since its last refresh.
+    """
+    store = store or IncrementalSwapStore(db, collections_for(tokens), mirror=mirror, max_workers=max_workers,
+                                          min_block=min_block, max_block=max_block)
+    with spans.span("load") as record:
+        combined_df = store.refresh()
+        record["rows_out"] = spans.rows(combined_df)
+    return combined_df
+
+
+def load_token(db, token, mirror=None):
+    """All swaps of one token with unprefixed amount columns in the compact schema, None when it has none.
+
+    Rows are kept as stored (no fee/price filter), as the token page has always shown them.
+    """
+    with spans.span("fetch") as record:
+        df = load_token_swaps(db, token, mirror=mirror)
+        record["rows_out"] = len(df)
+    if df.empty:
+        return None
+    with spans.span("normalize", rows_in=len(df)) as record:
+        df = normalize_swaps(df, token)
+        df["timestampReadable"] = pd.to_datetime(df["timestampReadable"], errors="coerce")
+        df = compact_swaps(df)
+        record["rows_out"] = len(df)
+    return df
+
+
+def launch_blocks(db, combined_df=None):
+    """Token symbol -> launch block"""
+    with spans.span("launch_blocks", rows_in=spans.rows(combined_df)) as record:
+        blocks = load_launch_blocks(db, combined_df)
+        record["rows_out"] = len(blocks)
+    return blocks
+
+
+def detect(combined_df, token_launch_blocks, processes=PIPELINE_PROCESSES):
+    """Launch-window large buys of makers who sold again within 20 minutes.
+
+    With `processes` above 1 a large frame is split by token over a process pool (see `parallel`).
+    """
+    with spans.span("detect", rows_in=spans.rows(combined_df)) as record:
+        if parallel.use_pool(combined_df, processes):
+            record["processes"] = processes
+            snipers = parallel.detect_snipers(combined_df, token_launch_blocks, processes)
+        else:
+            snipers = detect_snipers(combined_df, token_launch_blocks)
+        record["rows_out"] = spans.rows(snipers)
+    return snipers
+
+
+def pnl(potential_sniper_df, combined_df, latest_prices=None, view="sniper", processes=PIPELINE_PROCESSES):
+    """PnL table of the detected snipers; `view` is "sniper" (wallet and token) or "token" (wallet)"""
+    with spans.span("pnl", rows_in=spans.rows(potential_sniper_df)) as record:
+        pairs = None
+        if parallel.use_pool(combined_df, processes):
+            record["processes"] = processes
+            pairs = parallel.pair_results(potential_sniper_df, combined_df, processes, **PAIR_OPTIONS[view])
+        pnl_df = VIEWS[view](potential_sniper_df, combined_df, latest_prices=latest_prices, pairs=pairs)
+        record["rows_out"] = spans.rows(pnl_df)
+    return pnl_df
+
+
+def token_version(db, token):
+    """(highest blockNumber, document count) of a token's swaps; changes whenever swaps are ingested"""
+    collection = db[f"{token.lower()}_swap"]
+    latest = collection.find_one({}, {"blockNumber": 1}, sort=[("blockNumber", -1)])
+    return (latest or {}).get("blockNumber"), collection.estimated_document_count()
+
+
+def version_token(version):
+    """Short string standing for a data version, so a cache key costs almost nothing to hash"""
+    return hashlib.blake2b(repr(version).encode(), digest_size=8).hexdigest()
+
+
+class VersionedPipeline:
+    """load -> detect -> pnl over a resident `IncrementalSwapStore`, with stage outputs kept per data version.
+
+    `refresh` brings the store up to date and returns its version: a token over the
+    per-collection high-water blocks and row counts. Detection and PnL results are stored under that
+    version (and the launch blocks they used), so asking again while the data is unchanged
+    is a dict lookup rather than a recomputation or a hash of the frames. Results of the
+    last `max_versions` versions are kept.
+    """
+
+    def __init__(self, store, max_versions=2):
+        self.store = store
+        self.max_versions = max_versions
+        self.version = None
+        self._combined = None
+        self._latest_prices = None
+        self._stages = {}  # version -> {(stage, launch blocks): output}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self):
+        """Fetch new swaps and return the data version"""
+        with self._refresh_lock, spans.span("refresh") as record:
+            combined_df = self.store.refresh()
+            record["rows_out"] = spans.rows(combined_df)
+            with self._lock:
+                self.version = version_token(self.store.version)
+                self._combined = combined_df
+                self._latest_prices = self.store.latest_prices
+            return self.version
+
+    def combined(self):
+        """The combined swap frame of the current version (None before the first refresh or without swaps)"""
+        return self._combined
+
+    def _current(self):
+        with self._lock:
+            return self.version, self._combined, self._latest_prices
+
+    def _stage(self, version, name, token_launch_blocks, compute):
+        key = (name, tuple(sorted((str(token), None if pd.isna(block) else block)
+                                  for token, block in token_launch_blocks.items())))
+        with self._lock:
+            outputs = self._stages.get(version, {})
+            if key in outputs:
+                return outputs[key]
+        output = compute()
+        with self._lock:
+            self._stages.setdefault(version, {})[key] = output
+            while len(self._stages) > self.max_versions:
+                self._stages.pop(next(iter(self._stages)))
+        return output
+
+    def _snipers(self, data, token_launch_blocks):
+        version, combined_df, _ = data
+        if combined_df is None:
+            return None
+        return self._stage(version, "detect", token_launch_blocks, lambda: detect(combined_df, token_launch_blocks))
+
+    def snipers(self, token_launch_blocks):
+        """Detected sniper buys of the current version (None without swaps)"""
+        return self._snipers(self._current(), token_launch_blocks)
+
+    def pnl(self, token_launch_blocks):
+        """Sniper PnL table of the current version (None without swaps)"""
+        data = self._current()
+        version, combined_df, latest_prices = data
+        if combined_df is None:
+            return None
+        return self._stage(version, "pnl", token_launch_blocks, lambda: pnl(
+            self._snipers(data, token_launch_blocks), combined_df, latest_prices=latest_prices))
+
+
+def run(db, tokens=None, mirror=None, store=None, max_workers=LOAD_WORKERS, min_block=None, max_block=None,
+        processes=PIPELINE_PROCESSES):
+    """load -> detect -> pnl over the given tokens and block range; returns the PnL table (None without swaps)"""
+    if store is None:
+        store = IncrementalSwapStore(db, collections_for(tokens), mirror=mirror, max_workers=max_workers,
+                                     min_block=min_block, max_block=max_block)
+    combined_df = load(db, store=store)
+    if combined_df is None:
+        return None
+    snipers = detect(combined_df, launch_blocks(db, combined_df), processes=processes)
+    pnl_df = pnl(snipers, combined_df, latest_prices=store.latest_prices, processes=processes)
+    report = memory_report({"load": combined_df, "detect": snipers, "pnl": pnl_df})
+    print("Memory per stage:", ", ".join(f"{r.stage} {r.rows} rows {r.memory_mb} MB" for r in report.itertuples()))
+    return pnl_df
+
+
+def main(argv=None):
+    from genesis_analytics import batch
+
+    return batch.main(argv)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
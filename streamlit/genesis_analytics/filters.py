@@ -0,0 +1,184 @@
+"""In-memory filter engine for the transaction table of one token.
+
+Built once per data load, it keeps a stable ascending permutation of the rows and the
+sorted values for every numeric column (text columns get their permutation on the first
+sort by them), row-id postings for the swap type and label, and a `MakerBlockSearch`
+suffix index for the search box. A filter request then:
+
+  * resolves each filter to a candidate row-id set, by posting lookup, by binary search
+    on the sorted values for the date and numeric ranges, or by suffix-index lookup for
+    the search box,
+  * starts from the smallest set and checks the other filters on those rows only,
+  * orders the survivors by their rank in the sort column's permutation.
+
+So filter latency follows the size of the smallest matching set, not the token's history.
+The engine answers the same calls as `transactions.MongoTransactionSource`, with row
+offsets as page cursors.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from genesis_analytics.search import MakerBlockSearch
+from genesis_analytics.transactions import DEFAULT_PAGE_SIZE, TABLE_FIELDS, derive_amounts
+
+NUMERIC_FIELDS = ["blockNumber", "timestamp", "token_amount", "virtual_amount", "genesis_usdc_price", "tx_value",
+                  "genesis_virtual_price", "virtual_usdc_price"]
+TEXT_FIELDS = ["txHash", "maker", "swapType", "label", "timestampReadable"]
+POSTING_FIELDS = ["swapType", "label"]
+SELECTION_CACHE_SIZE = 16
+
+
+class TransactionFilterEngine:
+    """Pre-sorted indexes over one token's transaction table"""
+
+    def __init__(self, table):
+        table = table.reset_index(drop=True)
+        self.n = len(table)
+        timestamps = pd.to_numeric(table["timestamp"], errors="coerce")
+        self._time_bounds = (timestamps.min(), timestamps.max())
+        # Missing values count as 0 / "" as the table always showed them
+        for field in NUMERIC_FIELDS:
+            table[field] = pd.to_numeric(table[field], errors="coerce").fillna(0)
+        for field in TEXT_FIELDS:
+            table[field] = table[field].where(table[field].notna(), "").astype(str)
+        self.table = table[TABLE_FIELDS]
+
+        self._values = {field: table[field].to_numpy() for field in TABLE_FIELDS}
+        self._orders = {}
+        self._ranks = {}
+        self._sorted = {}
+        for field in NUMERIC_FIELDS:
+            order = self._order(field)
+            self._sorted[field] = self._values[field][order]
+
+        self._codes = {}
+        self._postings = {}
+        for field in POSTING_FIELDS:
+            codes, uniques = pd.factorize(self._values[field])
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self._codes[field] = (codes, {value: i for i, value in enumerate(uniques)})
+            self._postings[field] = {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+        self.search = MakerBlockSearch(self._values["maker"], self._values["blockNumber"])
+
+        self._lock = threading.Lock()
+        self._selections = {}  # recent filter keys -> row ids; a rerun asks for the same set several times
+
+    @classmethod
+    def from_swaps(cls, swaps, token):
+        """Engine over raw swap documents of one token, deriving the amount and value columns"""
+        table = swaps.join(derive_amounts(swaps, token))
+        for field in TABLE_FIELDS:
+            if field not in table.columns:
+                table[field] = np.nan
+        return cls(table)
+
+    def _order(self, field):
+        order = self._orders.get(field)
+        if order is None:
+            order = np.argsort(self._values[field], kind="stable")
+            self._orders[field] = order
+        return order
+
+    def _rank(self, field):
+        rank = self._ranks.get(field)
+        if rank is None:
+            rank = np.empty(self.n, dtype=np.int64)
+            rank[self._order(field)] = np.arange(self.n)
+            self._ranks[field] = rank
+        return rank
+
+    def _range(self, field, lo, hi):
+        """Row ids with lo <= value <= hi, in value order, by binary search"""
+        values = self._sorted[field]
+        start = np.searchsorted(values, lo, side="left") if lo is not None else 0
+        stop = np.searchsorted(values, hi, side="right") if hi is not None else self.n
+        return self._orders[field][start:stop]
+
+    def _constraints(self, filters, range_field, value_range):
+        """(candidate row ids, check on a row-id array) for every active filter"""
+        constraints = []
+        for field, key in (("swapType", "swap_type"), ("label", "label")):
+            value = filters.get(key)
+            if value:
+                codes, code_of = self._codes[field]
+                code = code_of.get(value, -2)
+                ids = self._postings[field].get(value, np.empty(0, dtype=np.int64))
+                constraints.append((ids, lambda rows, codes=codes, code=code: codes[rows] == code))
+        start_ts, end_ts = filters.get("start_ts"), filters.get("end_ts")
+        if start_ts is not None or end_ts is not None:
+            constraints.append(self._range_constraint("timestamp", start_ts, end_ts))
+        if range_field is not None and value_range is not None:
+            constraints.append(self._range_constraint(range_field, *value_range))
+        search = (filters.get("search") or "").strip()
+        if search:
+            ids = self.search.lookup(search)
+            constraints.append((ids, lambda rows: np.isin(rows, ids, assume_unique=True)))
+        return constraints
+
+    def _range_constraint(self, field, lo, hi):
+        values = self._values[field]
+        lo_ok = (lambda rows: values[rows] >= lo) if lo is not None else (lambda rows: np.ones(len(rows), dtype=bool))
+        hi_ok = (lambda rows: values[rows] <= hi) if hi is not None else (lambda rows: np.ones(len(rows), dtype=bool))
+        return self._range(field, lo, hi), lambda rows: lo_ok(rows) & hi_ok(rows)
+
+    def select(self, filters, range_field=None, value_range=None):
+        """Row ids matching the filters, in row order"""
+        key = (tuple(sorted(filters.items())), range_field, value_range)
+        with self._lock:
+            if key in self._selections:
+                return self._selections[key]
+        constraints = self._constraints(filters, range_field, value_range)
+        if constraints:
+            constraints.sort(key=lambda constraint: len(constraint[0]))
+            rows = np.sort(constraints[0][0])
+            for _, check in constraints[1:]:
+                rows = rows[check(rows)]
+        else:
+            rows = np.arange(self.n)
+        with self._lock:
+            if len(self._selections) >= SELECTION_CACHE_SIZE:
+                self._selections.pop(next(iter(self._selections)))
+            self._selections[key] = rows
+        return rows
+
+    def ordered(self, rows, sort_field, ascending=True):
+        """Rows in `(sort_field, row)` order taken from the precomputed permutation"""
+        if len(rows) * max(np.log2(len(rows) + 1), 1) < self.n:
+            rows = rows[np.argsort(self._rank(sort_field)[rows], kind="stable")]
+        else:
+            keep = np.zeros(self.n, dtype=bool)
+            keep[rows] = True
+            order = self._order(sort_field)
+            rows = order[keep[order]]
+        return rows if ascending else rows[::-1]
+
+    def page(self, filters, sort_field="blockNumber", ascending=True, page_size=DEFAULT_PAGE_SIZE,
+             after=None, range_field=None, value_range=None):
+        """One page of the filtered table and the offset of the next page (None on the last page)"""
+        rows = self.ordered(self.select(filters, range_field, value_range), sort_field, ascending)
+        offset = after or 0
+        next_offset = offset + page_size if offset + page_size < len(rows) else None
+        return self.table.iloc[rows[offset:offset + page_size]].reset_index(drop=True), next_offset
+
+    def count(self, filters, range_field=None, value_range=None):
+        return len(self.select(filters, range_field, value_range))
+
+    def value_bounds(self, filters, field):
+        rows = self.select(filters)
+        if len(rows) == 0:
+            return None, None
+        values = self._values[field][rows]
+        return values.min(), values.max()
+
+    def label_options(self):
+        return sorted(label for label in self._postings["label"] if label)
+
+    def time_bounds(self):
+        lo, hi = self._time_bounds
+        if pd.isna(lo):
+            return None, None
+        return pd.to_datetime(lo, unit="s", utc=True), pd.to_datetime(hi, unit="s", utc=True)
@@ -0,0 +1,205 @@
+"""Index management for the swap collections and the metadata collections the app reads.
+
+    python -m genesis_analytics.indexes ensure            # create the missing indexes
+    python -m genesis_analytics.indexes usage             # $indexStats per collection
+    python -m genesis_analytics.indexes explain [--strict] # winning plan of every app query shape
+
+`explain` prints one line per (collection, query shape) with the plan stages and indexes
+used, and flags COLLSCAN plans and in-memory SORT stages. With --strict it exits non-zero
+when any collection scan is found, so it can gate a deploy.
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from genesis_analytics import transactions
+from genesis_analytics.cards import CARDS_PIPELINE, PERSONA_COLLECTION
+from genesis_analytics.candidates import PRICED_SWAP, candidate_pipeline
+from genesis_analytics.db import PERSONA_DB, get_client
+from genesis_analytics.detection import LAUNCH_BLOCK_WINDOW
+from genesis_analytics.snapshots import MANIFEST_COLLECTION, SNAPSHOT_COLLECTION
+from genesis_analytics.swaps import SWAP_DB, discover_swap_collections
+
+# Indexes every `<token>_swap` collection needs, as (keys, options)
+SWAP_INDEXES = [
+    ([("blockNumber", 1), ("_id", 1)], {}),           # incremental refresh, mirror delta, table keyset pages
+    ([("timestamp", 1)], {}),                         # latest price, launch window end, date filter
+    ([("maker", 1), ("timestamp", 1)], {}),           # candidate swaps, maker lookups
+    ([("swapType", 1), ("blockNumber", 1)], {}),      # launch-window buys, type filter on the table
+    ([("genesis_token_symbol", 1), ("timestamp", 1)], {}),  # first swap of a token (page header)
+    ([("label", 1)], {}),                             # swap type options and filter
+]
+
+# (database, collection) -> indexes for the metadata collections
+METADATA_INDEXES = {
+    (SWAP_DB, "swap_progress"): [([("token_symbol", 1)], {})],
+    (SWAP_DB, "Personas"): [([("symbol", 1)], {})],
+    (SWAP_DB, SNAPSHOT_COLLECTION): [([("snapshot", 1)], {})],
+    (SWAP_DB, MANIFEST_COLLECTION): [([("snapshot", -1)], {})],
+    (PERSONA_DB, PERSONA_COLLECTION): [([("symbol", 1), ("name", 1)], {})],
+}
+
+
+def index_name(keys):
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def swap_collections(client, collections=None):
+    return discover_swap_collections(client[SWAP_DB]) if collections is None else collections
+
+
+def ensure_indexes(client, collections=None):
+    """Create the missing indexes; returns the names created per collection"""
+    collections = swap_collections(client, collections)
+    targets = [(SWAP_DB, col_name, SWAP_INDEXES) for col_name in collections]
+    targets += [(db_name, col_name, indexes) for (db_name, col_name), indexes in METADATA_INDEXES.items()]
+    created = {}
+    for db_name, col_name, indexes in targets:
+        collection = client[db_name][col_name]
+        existing = {tuple(info["key"]) for info in collection.index_information().values()}
+        for keys, options in indexes:
+            if tuple(keys) not in existing:
+                collection.create_index(keys, name=index_name(keys), **options)
+                created.setdefault(f"{db_name}.{col_name}", []).append(index_name(keys))
+    return created
+
+
+def index_usage(client, collections=None):
+    """One row per index with the number of operations that used it since the server started"""
+    collections = swap_collections(client, collections)
+    targets = [(SWAP_DB, col_name) for col_name in collections] + list(METADATA_INDEXES)
+    rows = []
+    for db_name, col_name in targets:
+        for stat in client[db_name][col_name].aggregate([{"$indexStats": {}}]):
+            rows.append({
+                "collection": f"{db_name}.{col_name}",
+                "index": stat["name"],
+                "ops": stat["accesses"]["ops"],
+                "since": stat["accesses"]["since"],
+            })
+    return pd.DataFrame(rows, columns=["collection", "index", "ops", "since"])
+
+
+def swap_query_shapes(db, col_name):
+    """(name, explain command) for every query the app sends to one swap collection"""
+    collection = db[col_name]
+    token = col_name.replace("_swap", "")
+    sample = collection.find_one({}, {"blockNumber": 1, "timestamp": 1, "maker": 1}, sort=[("blockNumber", -1)]) or {}
+    block = sample.get("blockNumber", 0)
+    ts = sample.get("timestamp", 0)
+    maker = sample.get("maker", "")
+
+    def find(filter, sort=None, limit=0):
+        command = {"find": col_name, "filter": filter, "limit": limit}
+        if sort:
+            command["sort"] = sort
+        return command
+
+    def aggregate(pipeline):
+        return {"aggregate": col_name, "pipeline": pipeline, "cursor": {}}
+
+    return [
+        ("refresh since high-water block", find({"blockNumber": {"$gte": block}})),
+        ("latest priced swap", find(PRICED_SWAP, {"timestamp": -1}, 1)),
+        ("launch window end", find({"blockNumber": {"$lte": block + LAUNCH_BLOCK_WINDOW}, "timestamp": {"$ne": None}},
+                                   {"timestamp": -1}, 1)),
+        ("candidate makers", aggregate(candidate_pipeline(token.upper() + "_", block, ts))),
+        ("candidate swaps", find({"maker": {"$in": [maker]}})),
+        ("first swap of token", find({"genesis_token_symbol": token.upper()}, {"timestamp": 1}, 1)),
+        ("table page by block", aggregate(transactions.page_pipeline(token, {}))),
+        ("table page of buys", aggregate(transactions.page_pipeline(token, transactions.transaction_filter("buy")))),
+        ("table page by time", aggregate(transactions.page_pipeline(
+            token, transactions.transaction_filter(start_ts=ts - 86400, end_ts=ts), sort_field="timestamp"))),
+    ]
+
+
+def metadata_query_shapes(client):
+    return [
+        (client[SWAP_DB], "swap_progress", "token metadata",
+         {"find": "swap_progress", "filter": {"token_symbol": "X"}, "limit": 1}),
+        (client[PERSONA_DB], PERSONA_COLLECTION, "token cards",
+         {"aggregate": PERSONA_COLLECTION, "pipeline": CARDS_PIPELINE, "cursor": {}}),
+        (client[SWAP_DB], MANIFEST_COLLECTION, "latest snapshot",
+         {"find": MANIFEST_COLLECTION, "filter": {}, "sort": {"snapshot": -1}, "limit": 1}),
+        (client[SWAP_DB], SNAPSHOT_COLLECTION, "snapshot rows",
+         {"find": SNAPSHOT_COLLECTION, "filter": {"snapshot": "X"}}),
+    ]
+
+
+def plan_stages(plan):
+    """Flatten a winning plan into (stage, index name) pairs, outermost first"""
+    stages = [(plan.get("stage"), plan.get("indexName"))]
+    children = plan.get("inputStages") or ([plan["inputStage"]] if "inputStage" in plan else [])
+    for child in children:
+        stages.extend(plan_stages(child))
+    return stages
+
+
+def winning_plan(explain):
+    """The query planner's winning plan, also when it sits in the first stage of an aggregation"""
+    if "stages" in explain:
+        planner = explain["stages"][0]["$cursor"]["queryPlanner"]
+    else:
+        planner = explain.get("queryPlanner", {})
+    plan = planner.get("winningPlan", {})
+    return plan.get("queryPlan", plan)  # slot-based engine wraps the classic plan
+
+
+def explain_shape(db, command):
+    stages = plan_stages(winning_plan(db.command("explain", command, verbosity="queryPlanner")))
+    names = [stage for stage, _ in stages]
+    return {
+        "plan": " > ".join(names),
+        "indexes": ", ".join(sorted({index for _, index in stages if index})),
+        "collscan": "COLLSCAN" in names,
+        "memory_sort": "SORT" in names,
+    }
+
+
+def explain_report(client, collections=None):
+    """Winning plan of every app query shape, one row per (collection, shape)"""
+    collections = swap_collections(client, collections)
+    rows = []
+    swap_db = client[SWAP_DB]
+    targets = [(swap_db, col_name, name, command)
+               for col_name in collections for name, command in swap_query_shapes(swap_db, col_name)]
+    targets += metadata_query_shapes(client)
+    for db, col_name, name, command in targets:
+        rows.append({"collection": f"{db.name}.{col_name}", "query": name, **explain_shape(db, command)})
+    return pd.DataFrame(rows, columns=["collection", "query", "plan", "indexes", "collscan", "memory_sort"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ensure and inspect the indexes the app relies on")
+    parser.add_argument("command", choices=["ensure", "usage", "explain"])
+    parser.add_argument("collections", nargs="*", help="swap collections (default: all discovered)")
+    parser.add_argument("--strict", action="store_true", help="exit with status 1 if any query shape scans a collection")
+    args = parser.parse_args(argv)
+
+    client = get_client()
+    collections = swap_collections(client, args.collections or None)
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_rows", None)
+    pd.set_option("display.max_colwidth", 80)
+
+    if args.command == "ensure":
+        created = ensure_indexes(client, collections)
+        for name, indexes in created.items():
+            print(f"{name}: created {', '.join(indexes)}")
+        print(f"{sum(len(indexes) for indexes in created.values())} indexes created")
+    elif args.command == "usage":
+        print(index_usage(client, collections).to_string(index=False))
+    else:
+        report = explain_report(client, collections)
+        print(report.to_string(index=False))
+        scans = report[report["collscan"]]
+        if len(scans):
+            print(f"\n{len(scans)} query shapes scan the whole collection:")
+            print(scans[["collection", "query"]].to_string(index=False))
+            if args.strict:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
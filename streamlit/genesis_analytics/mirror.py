@@ -0,0 +1,202 @@
+"""On-disk Parquet mirror of the `<token>_swap` collections.
+
+Layout, one directory per token and one file per block range:
+
+    <root>/<TOKEN>/_manifest.json
+    <root>/<TOKEN>/blocks-000029000000-000029049999.parquet
+
+Files keep the raw Mongo field names (minus `_id`) so every page can read the columns it
+already asks Mongo for. Syncing is incremental on `blockNumber`: only the bucket holding the
+previous high-water block and newer buckets are rewritten.
+
+    python -m genesis_analytics.mirror [--root DIR] [jarvis_swap ...]
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from genesis_analytics.swaps import discover_swap_collections
+
+DEFAULT_MIRROR_DIR = os.getenv("SWAP_MIRROR_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "swap_mirror"))
+BLOCK_BUCKET = 50_000
+UNKNOWN_BUCKET = "blocks-unknown.parquet"
+
+
+def _arrow_safe(df):
+    """Cast object columns holding mixed python types to strings so Arrow can store them"""
+    for col in df.columns:
+        if df[col].dtype == object:
+            types = {type(v) for v in df[col].dropna()}
+            if len(types) > 1:
+                df[col] = df[col].map(lambda v: v if v is None or (isinstance(v, float) and pd.isna(v)) else str(v))
+    return df
+
+
+def _write_parquet(df, path):
+    tmp = path + ".tmp"
+    _arrow_safe(df).to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+class SwapMirror:
+    """Columnar copy of the swap collections, partitioned by token and block range"""
+
+    def __init__(self, root=DEFAULT_MIRROR_DIR, bucket_size=BLOCK_BUCKET):
+        self.root = root
+        self.bucket_size = bucket_size
+
+    def token_dir(self, token):
+        return os.path.join(self.root, token.upper())
+
+    def manifest(self, token):
+        """Return the sync manifest for a token, or None if it was never mirrored"""
+        path = os.path.join(self.token_dir(token), "_manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def has(self, token):
+        return self.manifest(token) is not None
+
+    def tokens(self):
+        """Symbols of every mirrored token"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if self.has(name))
+
+    def _bucket_file(self, start):
+        return f"blocks-{start:012d}-{start + self.bucket_size - 1:012d}.parquet"
+
+    def sync(self, db, collections=None):
+        """Sync every collection (all discovered ones by default) and return the rows written per collection"""
+        if collections is None:
+            collections = discover_swap_collections(db)
+        return {col_name: self.sync_collection(db, col_name) for col_name in collections}
+
+    def sync_collection(self, db, col_name):
+        """Copy swaps at or above the mirrored high-water block into the affected bucket files"""
+        token = col_name.replace('_swap', '').upper()
+        token_dir = self.token_dir(token)
+        os.makedirs(token_dir, exist_ok=True)
+        manifest = self.manifest(token) or {"collection": col_name, "high_water": None, "boundary_count": 0, "buckets": {}}
+        hwm = manifest["high_water"]
+
+        query = {} if hwm is None else {"blockNumber": {"$gte": hwm}}
+        data = list(db[col_name].find(query, {"_id": 0}))
+        if not data:
+            return 0
+        df = pd.DataFrame(data)
+        if "blockNumber" not in df.columns:
+            df["blockNumber"] = None
+        blocks = pd.to_numeric(df["blockNumber"], errors="coerce")
+        new_hwm = blocks.max()
+        if pd.isna(new_hwm):
+            new_hwm = hwm
+        elif hwm is not None and new_hwm == hwm and len(df) == manifest["boundary_count"]:
+            return 0
+
+        if hwm is None and blocks.isna().any():
+            _write_parquet(df[blocks.isna()].reset_index(drop=True), os.path.join(token_dir, UNKNOWN_BUCKET))
+            manifest["buckets"]["unknown"] = UNKNOWN_BUCKET
+
+        known = df[blocks.notna()]
+        starts = (blocks[blocks.notna()] // self.bucket_size * self.bucket_size).astype("int64")
+        for start, rows in known.groupby(starts.values):
+            start = int(start)
+            name = self._bucket_file(start)
+            path = os.path.join(token_dir, name)
+            if hwm is not None and os.path.exists(path):
+                resident = pd.read_parquet(path)
+                resident = resident[~(pd.to_numeric(resident["blockNumber"], errors="coerce") >= hwm)]
+                rows = pd.concat([resident, rows], ignore_index=True)
+            _write_parquet(rows.reset_index(drop=True), path)
+            manifest["buckets"][str(start)] = name
+
+        if new_hwm is not None:
+            new_hwm = int(new_hwm)
+            manifest["high_water"] = new_hwm
+            manifest["boundary_count"] = int((blocks == new_hwm).sum())
+        tmp = os.path.join(token_dir, "_manifest.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, os.path.join(token_dir, "_manifest.json"))
+        return len(df)
+
+    def read(self, token, columns=None, min_block=None, max_block=None):
+        """Read a token's mirrored swaps, limited to the given raw columns and block range"""
+        manifest = self.manifest(token)
+        if manifest is None:
+            return None
+        import pyarrow.parquet as pq
+
+        buckets = manifest["buckets"]
+        names = [buckets["unknown"]] if "unknown" in buckets and min_block is None and max_block is None else []
+        for start in sorted(int(k) for k in buckets if k != "unknown"):
+            if max_block is not None and start > max_block:
+                continue
+            if min_block is not None and start + self.bucket_size - 1 < min_block:
+                continue
+            names.append(buckets[str(start)])
+
+        frames = []
+        for name in names:
+            path = os.path.join(self.token_dir(token), name)
+            cols = None
+            if columns is not None:
+                available = set(pq.read_schema(path).names)
+                cols = [c for c in columns if c in available]
+            frames.append(pd.read_parquet(path, columns=cols))
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+        df = pd.concat(frames, ignore_index=True)
+        if (min_block is not None or max_block is not None) and "blockNumber" in df.columns:
+            blocks = df["blockNumber"]
+            keep = pd.Series(True, index=df.index)
+            if min_block is not None:
+                keep &= blocks >= min_block
+            if max_block is not None:
+                keep &= blocks <= max_block
+            df = df[keep].reset_index(drop=True)
+        return df
+
+
+def load_token_swaps(db, token, columns=None, mirror=None):
+    """Read a token's swaps from the mirror plus whatever Mongo ingested since the last sync"""
+    mirror = mirror or SwapMirror()
+    col_name = f"{token.lower()}_swap"
+    if columns is not None and "blockNumber" not in columns:
+        columns = list(columns) + ["blockNumber"]
+    projection = {c: 1 for c in columns} if columns is not None else None
+
+    manifest = mirror.manifest(token)
+    if manifest is None or manifest["high_water"] is None:
+        df = pd.DataFrame(list(db[col_name].find({}, projection)))
+        return df.drop(columns=["_id"], errors="ignore")
+
+    hwm = manifest["high_water"]
+    resident = mirror.read(token, columns)
+    resident = resident[~(pd.to_numeric(resident["blockNumber"], errors="coerce") >= hwm)]
+    delta = pd.DataFrame(list(db[col_name].find({"blockNumber": {"$gte": hwm}}, projection)))
+    delta = delta.drop(columns=["_id"], errors="ignore")
+    return pd.concat([resident, delta], ignore_index=True)
+
+
+def main(argv=None):
+    from genesis_analytics.db import swap_db
+
+    parser = argparse.ArgumentParser(description="Sync the local Parquet mirror of the swap collections")
+    parser.add_argument("collections", nargs="*", help="collections to sync (default: all)")
+    parser.add_argument("--root", default=DEFAULT_MIRROR_DIR, help="mirror directory")
+    args = parser.parse_args(argv)
+
+    db = swap_db()
+    mirror = SwapMirror(args.root)
+    for col_name, rows in mirror.sync(db, args.collections or None).items():
+        print(f"{col_name}: {rows} rows written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Sniper detection and PnL on a process pool, partitioned by token.
+
+Both stages work per (maker, token) pair, so the swaps are cut into partitions that keep
+pairs whole: one per token, and for a token holding more than a task's share of the rows,
+several by maker (the maker's dictionary code modulo the token's bucket count). Rows are
+sorted by partition and copied once into shared memory, one block per column
+(categoricals as codes plus their categories). A task is only a row range; the worker
+copies its rows out of the shared blocks instead of receiving a pickled DataFrame, closes
+them again, and sends back row positions or one row per pair. Once the parent unlinks the
+blocks at the end of a run, no process maps them and the memory is freed.
+
+Results are merged in the order the serial functions produce them:
+
+    detect   sniper buy positions, filtered on the quick sellers of every partition and
+             re-sorted by (maker, token, time) in row order, as `detect_snipers` sorts
+    pnl      per-pair results, in the first-seen order of the sniper pairs
+
+so the tables equal the serial ones whatever the number of processes (the detection
+table comes back with a fresh RangeIndex).
+
+The pool uses the spawn start method, since the dashboards run threads, and lives as
+long as the process. Frames under PARALLEL_MIN_ROWS swaps run in-process.
+"""
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from genesis_analytics.detection import detect_snipers as serial_detect_snipers, launch_window_buys
+from genesis_analytics.pnl import PAIR_COLS, pair_results as serial_pair_results
+from genesis_analytics.swaps import SWAP_COLUMNS
+
+PIPELINE_PROCESSES = int(os.getenv("PIPELINE_PROCESSES", 1))
+PARALLEL_MIN_ROWS = int(os.getenv("PARALLEL_MIN_ROWS", 200_000))
+TASKS_PER_PROCESS = 2  # a few tasks each, so partitions of different sizes even out
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def use_pool(combined_df, processes):
+    return processes > 1 and combined_df is not None and len(combined_df) >= PARALLEL_MIN_ROWS
+
+
+def _codes(values, dtype):
+    """Dictionary codes of `values` under a categorical dtype (-1 for missing)"""
+    return np.asarray(pd.Categorical(values, dtype=dtype).codes)
+
+
+def partition(df, processes):
+    """Row order that groups the partitions, and the (start, stop) ranges of the tasks in it.
+
+    A task takes whole partitions until it holds about len(df) / (processes * TASKS_PER_PROCESS) rows.
+    """
+    target = max(1, math.ceil(len(df) / (processes * TASKS_PER_PROCESS)))
+    token = np.asarray(df["token_name"].cat.codes, dtype=np.int64) + 1  # missing tokens first
+    maker = np.asarray(df["maker"].cat.codes, dtype=np.int64)
+    counts = np.bincount(token, minlength=1)
+    buckets = np.maximum(1, -(-counts // target))
+    key = token * int(buckets.max()) + maker % buckets[token]
+    order = np.argsort(key, kind="stable")
+    sorted_key = key[order]
+    bounds = np.append(np.flatnonzero(np.diff(sorted_key)) + 1, len(df)).tolist()
+    ranges, lo = [], 0
+    for prev, hi in zip([0] + bounds[:-1], bounds):
+        if prev > lo and hi - lo > target:
+            ranges.append((lo, prev))
+            lo = prev
+    if lo < len(df):
+        ranges.append((lo, len(df)))
+    return order, ranges
+
+
+class SharedFrame:
+    """Columns of a frame copied into shared memory in a given row order.
+
+    Missing `SWAP_COLUMNS` are left out; string columns travel as categoricals. `spec` is
+    all a worker needs to rebuild any row range; blocks are released on exit.
+    """
+
+    def __init__(self, df, order):
+        self.blocks = []
+        self.spec = {"arrays": {}, "columns": []}
+        try:
+            self._put("__position__", order.astype(np.int64))
+            for col in [c for c in SWAP_COLUMNS if c in df.columns]:
+                values = df[col]
+                if not isinstance(values.dtype, (np.dtype, pd.CategoricalDtype)) or values.dtype == object:
+                    values = values.astype("category")
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    self._put(col, np.asarray(values.cat.codes)[order])
+                    self._put(col + "__categories__", values.cat.categories.to_numpy(dtype=str))
+                    self.spec["columns"].append((col, "category", values.dtype.ordered))
+                else:
+                    self._put(col, values.to_numpy()[order])
+                    self.spec["columns"].append((col, "values", None))
+        except BaseException:
+            self.close()
+            raise
+
+    def _put(self, name, array):
+        array = np.ascontiguousarray(array)
+        shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.blocks.append(shm)
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf)[:] = array
+        self.spec["arrays"][name] = (shm.name, array.dtype.str, len(array))
+
+    def close(self):
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ───── Worker side ─────
+def _open(name):
+    try:
+        return SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Pool workers share the parent's resource tracker, so attaching registers nothing new
+        return SharedMemory(name=name)
+
+
+def _frame(spec, lo, hi):
+    """Rows lo:hi of a shared frame, indexed by their position in the original frame.
+
+    The rows are copied out and every block is closed before returning: a worker that kept
+    a mapping would pin the whole segment in memory after the parent unlinks it.
+    """
+    copies = {}
+    for name, (shm_name, dtype, length) in spec["arrays"].items():
+        shm = _open(shm_name)
+        try:
+            array = np.ndarray((length,), np.dtype(dtype), buffer=shm.buf)
+            copies[name] = array.copy() if name.endswith("__categories__") else array[lo:hi].copy()
+            del array  # the view has to go before the block can close
+        finally:
+            shm.close()
+    data = {}
+    for col, kind, ordered in spec["columns"]:
+        if kind == "category":
+            dtype = pd.CategoricalDtype(pd.Index(copies[col + "__categories__"]), ordered=ordered)
+            data[col] = pd.Categorical.from_codes(copies[col], dtype=dtype)
+        else:
+            data[col] = copies[col]
+    return pd.DataFrame(data, index=pd.Index(copies["__position__"]))
+
+
+def _detect_task(spec, lo, hi, token_launch_blocks, amount_col, group_cols):
+    sniper_buys, quick_sellers = launch_window_buys(_frame(spec, lo, hi), token_launch_blocks, amount_col, group_cols)
+    return sniper_buys["Index"].to_numpy(dtype=np.int64), np.unique(np.asarray(quick_sellers.cat.codes))
+
+
+def _pnl_task(spec, lo, hi, pair_codes, fifo_kwargs):
+    frame = _frame(spec, lo, hi)
+    pairs = pd.DataFrame({col: pd.Categorical.from_codes(pair_codes[col], dtype=frame[col].dtype) for col in PAIR_COLS})
+    results = serial_pair_results(pairs, frame, **fifo_kwargs)
+    for col in PAIR_COLS:
+        results[col] = results[col].cat.codes
+    return results
+
+
+# ───── Parent side ─────
+def _executor(processes):
+    with _pools_lock:
+        if processes not in _pools:
+            _pools[processes] = ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn"))
+        return _pools[processes]
+
+
+def _ready():
+    return True
+
+
+def warm_up(processes):
+    """Start the pool's workers now rather than on the first task"""
+    pool = _executor(processes)
+    for future in [pool.submit(_ready) for _ in range(processes)]:
+        future.result()
+
+
+def _run_tasks(fn, shared, ranges, processes, *args):
+    """Results of `fn` over every range, in range order; the largest ranges are submitted first"""
+    pool = _executor(processes)
+    by_size = sorted(range(len(ranges)), key=lambda i: ranges[i][0] - ranges[i][1])
+    futures = {i: pool.submit(fn, shared.spec, *ranges[i], *args) for i in by_size}
+    return [futures[i].result() for i in range(len(ranges))]
+
+
+def _shareable(df):
+    """The frame with maker and token as categoricals, which partitioning needs"""
+    df = df[[c for c in SWAP_COLUMNS if c in df.columns]]
+    for col in PAIR_COLS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df = df.assign(**{col: df[col].astype("category")})
+    return df
+
+
+def detect_snipers(combined_df, token_launch_blocks, processes=PIPELINE_PROCESSES, amount_col="OUT_BeforeTax",
+                   group_cols=("maker", "token_name")):
+    """`detection.detect_snipers` over token partitions on the process pool"""
+    if combined_df.empty:
+        return serial_detect_snipers(combined_df, token_launch_blocks, amount_col, group_cols)
+    df = _shareable(combined_df)
+    order, ranges = partition(df, processes)
+    with SharedFrame(df, order) as shared:
+        results = _run_tasks(_detect_task, shared, ranges, processes, token_launch_blocks, amount_col, tuple(group_cols))
+    positions = np.concatenate([positions for positions, _ in results])
+    quick_sellers = np.concatenate([codes for _, codes in results])
+    positions = np.sort(positions[np.isin(np.asarray(df["maker"].cat.codes)[positions], quick_sellers)])
+    snipers = combined_df.iloc[positions].sort_values(by=list(group_cols) + ["timestampReadable"], kind="stable")
+    return snipers.reset_index(names="Index").reset_index(drop=True)
+
+
+def pair_results(potential_sniper_df, combined_df, processes=PIPELINE_PROCESSES, **fifo_kwargs):
+    """`pnl.pair_results` with the sniper makers' swaps partitioned over the process pool"""
+    sniper_pairs = potential_sniper_df[PAIR_COLS].drop_duplicates()
+    df = _shareable(combined_df)
+    df = df[df["maker"].isin(sniper_pairs["maker"])]
+    if df.empty:
+        return serial_pair_results(potential_sniper_df, combined_df.iloc[:0], **fifo_kwargs)
+    pair_codes = {col: _codes(sniper_pairs[col], df[col].dtype) for col in PAIR_COLS}
+    order, ranges = partition(df, processes)
+    with SharedFrame(df, order) as shared:
+        results = _run_tasks(_pnl_task, shared, ranges, processes, pair_codes, fifo_kwargs)
+    results = [r for r in results if len(r)]
+    if not results:
+        return serial_pair_results(potential_sniper_df, combined_df.iloc[:0], **fifo_kwargs)
+    results = pd.concat(results, ignore_index=True)
+    for col in PAIR_COLS:
+        results[col] = pd.Categorical.from_codes(results[col], dtype=df[col].dtype)
+    return sniper_pairs.merge(results, on=PAIR_COLS, how='inner')
@@ -0,0 +1,242 @@
+"""FIFO lot matching and PnL for sniper (maker, token) pairs."""
+import numpy as np
+import pandas as pd
+
+from genesis_analytics.prices import LatestPriceIndex
+
+PAIR_COLS = ['maker', 'token_name']
+
+
+def select_pair_trades(combined_df, pairs):
+    """Return the swaps of the given (maker, token) pairs sorted by pair then timestamp, plus pair offsets.
+
+    Ties on timestamp keep their ingest order. `offsets[i]:offsets[i + 1]` is the slice of
+    the i-th pair in the returned `keys` frame.
+    """
+    pairs = pairs[PAIR_COLS].dropna().drop_duplicates()
+    trades = combined_df.merge(pairs, on=PAIR_COLS, how='inner')
+    trades = trades.sort_values(by=PAIR_COLS + ['timestamp'], kind='stable').reset_index(drop=True)
+    if trades.empty:
+        return trades, pd.DataFrame(columns=PAIR_COLS), np.zeros(1, dtype=np.int64)
+    keys = trades[PAIR_COLS]
+    starts = np.flatnonzero(keys.ne(keys.shift()).any(axis=1).to_numpy())
+    offsets = np.append(starts, len(trades))
+    return trades, keys.iloc[starts].reset_index(drop=True), offsets
+
+
+def _column(trades, col, default=0.0):
+    if col not in trades.columns:
+        return np.full(len(trades), default)
+    return pd.to_numeric(trades[col], errors='coerce').to_numpy(dtype=float)
+
+
+def fifo_pnl(trades, offsets, buy_amount_col='OUT_AfterTax', buy_paid_col='OUT_BeforeTax',
+             sell_net_col='IN_AfterTax', sell_wallet_col='IN_BeforeTax', skip_invalid=True):
+    """Match each pair's sells against its buys first-in-first-out.
+
+    Buy lots are kept in flat per-pair lists with a head pointer instead of a deque of
+    dicts, and a partially consumed lot is updated in place. The arithmetic follows the
+    original per-trade loop step for step so results are identical. With `skip_invalid`,
+    trades without a positive price, buys without a positive pre-tax amount and sells
+    without a positive net amount are ignored, as on the global page.
+
+    Returns one row per pair, in `offsets` order, with realized PnL, remaining tokens,
+    the number of open lots and the quantity-weighted average holding time (seconds)
+    of the matched amounts.
+    """
+    swap_type = trades['swapType'].to_numpy()
+    price = _column(trades, 'genesis_usdc_price')
+    buy_amount = _column(trades, buy_amount_col)
+    buy_paid = _column(trades, buy_paid_col)
+    sell_net = _column(trades, sell_net_col)
+    sell_wallet = _column(trades, sell_wallet_col)
+    ts = _column(trades, 'timestamp', np.nan)
+
+    is_buy = swap_type == 'buy'
+    is_sell = swap_type == 'sell'
+    if skip_invalid:
+        valid_price = ~(price <= 0)
+        is_buy &= valid_price & ~(buy_paid <= 0)
+        is_sell &= valid_price & ~(sell_net <= 0)
+    kind = np.where(is_buy, 1, np.where(is_sell, 2, 0)).tolist()
+
+    price, buy_amount, buy_paid = price.tolist(), buy_amount.tolist(), buy_paid.tolist()
+    sell_net, sell_wallet, ts = sell_net.tolist(), sell_wallet.tolist(), ts.tolist()
+
+    realized_out, remaining_out, lots_out, holding_out = [], [], [], []
+    bounds = offsets.tolist()
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        lot_amount, lot_paid, lot_price, lot_ts = [], [], [], []
+        head = 0
+        realized = 0.0
+        held_weight = 0.0
+        held_amount = 0.0
+        for i in range(lo, hi):
+            if kind[i] == 1:
+                lot_amount.append(buy_amount[i])
+                lot_paid.append(buy_paid[i])
+                lot_price.append(price[i])
+                lot_ts.append(ts[i])
+            elif kind[i] == 2:
+                from_wallet = sell_wallet[i]
+                remaining_to_match = from_wallet
+                proceeds = sell_net[i] * price[i]
+                while remaining_to_match > 0 and head < len(lot_amount):
+                    amount = lot_amount[head]
+                    if amount == 0:
+                        # An empty lot can't be matched against (the old loop divided by zero here)
+                        head += 1
+                        continue
+                    matched = min(remaining_to_match, amount)
+                    matched_paid = lot_paid[head] * (matched / amount)
+                    realized += proceeds * (matched / from_wallet) - matched_paid * lot_price[head]
+                    held_weight += matched * (ts[i] - lot_ts[head])
+                    held_amount += matched
+                    remaining_to_match -= matched
+                    remaining_buy = amount - matched
+                    if remaining_buy > 0:
+                        lot_paid[head] = lot_paid[head] * (remaining_buy / amount)
+                        lot_amount[head] = remaining_buy
+                    else:
+                        head += 1
+        realized_out.append(realized)
+        remaining_out.append(sum(lot_amount[head:]))
+        lots_out.append(len(lot_amount) - head)
+        holding_out.append(held_weight / held_amount if held_amount > 0 else np.nan)
+
+    return pd.DataFrame({
+        'realized_pnl': realized_out,
+        'remaining_tokens': remaining_out,
+        'remaining_lots': lots_out,
+        'avg_holding_seconds': holding_out,
+    })
+
+
+def _nansum(values):
+    # Same reduction as Series.sum(): NaN filled with 0, then numpy's pairwise sum
+    return np.where(np.isnan(values), 0.0, values).sum()
+
+
+def _nanmean(values):
+    count = np.count_nonzero(~np.isnan(values))
+    return _nansum(values) / count if count else np.nan
+
+
+def pair_stats(trades, offsets):
+    """Per-pair trade counts, first buy / last sell times, average prices, tax and fees.
+
+    Float aggregates are reduced per pair slice the way Series.sum()/mean() do, so the
+    rounded figures match the old per-pair frames exactly (a groupby sum differs in the
+    last bits).
+    """
+    is_buy = trades['swapType'] == 'buy'
+    is_sell = trades['swapType'] == 'sell'
+    pair_id = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    stats = pd.DataFrame({
+        'buy': is_buy,
+        'sell': is_sell,
+        'buy_time': trades['timestampReadable'].where(is_buy),
+        'sell_time': trades['timestampReadable'].where(is_sell),
+    }).groupby(pair_id).agg(
+        buy_txn_count=('buy', 'sum'),
+        sell_txn_count=('sell', 'sum'),
+        first_buy_time=('buy_time', 'min'),
+        last_sell_time=('sell_time', 'max'),
+    ).reset_index(drop=True)
+
+    buy, sell = is_buy.to_numpy(), is_sell.to_numpy()
+    price = _column(trades, 'genesis_usdc_price', np.nan)
+    tax = _column(trades, 'Tax_1pct', np.nan)
+    fee = _column(trades, 'transactionFee', np.nan)
+    sums = {'avg_buy_price': [], 'avg_sell_price': [], 'total_tax_paid': [], 'total_transaction_fee_paid': []}
+    bounds = offsets.tolist()
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        pair_price = price[lo:hi]
+        sums['avg_buy_price'].append(_nanmean(pair_price[buy[lo:hi]]))
+        sums['avg_sell_price'].append(_nanmean(pair_price[sell[lo:hi]]))
+        sums['total_tax_paid'].append(_nansum(tax[lo:hi]))
+        sums['total_transaction_fee_paid'].append(_nansum(fee[lo:hi]))
+    for col, values in sums.items():
+        stats[col] = np.array(values, dtype=float)
+    return stats
+
+
+def pair_results(potential_sniper_df, combined_df, **fifo_kwargs):
+    """Run FIFO matching and trade stats for every sniper pair in a single pass.
+
+    Rows follow the first-seen order of the pairs in `potential_sniper_df`.
+    """
+    sniper_pairs = potential_sniper_df[PAIR_COLS].drop_duplicates()
+    trades, keys, offsets = select_pair_trades(combined_df, sniper_pairs)
+    results = pd.concat([keys, fifo_pnl(trades, offsets, **fifo_kwargs), pair_stats(trades, offsets)], axis=1)
+    return sniper_pairs.merge(results, on=PAIR_COLS, how='inner')
+
+
+def sniper_pnl_summary(potential_sniper_df, combined_df, latest_prices=None, pairs=None):
+    """PnL summary per sniper wallet and token for the global sniper pages.
+
+    `latest_prices` is a LatestPriceIndex over `combined_df`; one is built if not given.
+    `pairs` takes `pair_results` computed elsewhere (the process pool of `parallel`).
+    """
+    results = []
+    if latest_prices is None:
+        latest_prices = LatestPriceIndex.from_frame(combined_df)
+    if pairs is None:
+        pairs = pair_results(potential_sniper_df, combined_df)
+    for row in pairs.itertuples(index=False):
+        maker = row.maker
+        token = row.token_name
+        remaining_tokens = row.remaining_tokens
+        unrealized_pnl = remaining_tokens * float(latest_prices.price(token))
+
+        results.append({
+            'Sniper Wallet Address': maker,
+            'Token': token,
+            'Net PnL': round(row.realized_pnl, 6),
+            'Unrealized PnL': round(unrealized_pnl, 6),
+            'Remaining Tokens': round(remaining_tokens, 6),
+            'Buy Txn Count': int(row.buy_txn_count),
+            'Sell Txn Count': int(row.sell_txn_count),
+            'First Buy Time': row.first_buy_time,
+            'Last Sell Time': row.last_sell_time,
+            'Average Buy Price USD': round(np.float64(row.avg_buy_price), 6),
+            'Average Sell Price USD': round(np.float64(row.avg_sell_price), 6),
+            'Total Tax Paid': round(np.float64(row.total_tax_paid), 6),
+            'Total Transaction Fee Paid': round(np.float64(row.total_transaction_fee_paid), 6)
+        })
+
+    return pd.DataFrame(results)
+
+
+def token_pnl_summary(potential_sniper_df, combined_df, latest_prices=None, pairs=None):
+    """PnL summary per sniper wallet for the sniper tab of the token page.
+
+    Unlike the global summary no trade is skipped, and figures are rounded to 4 places.
+    `pairs` is as in `sniper_pnl_summary`.
+    """
+    results = []
+    if latest_prices is None:
+        latest_prices = LatestPriceIndex.from_frame(combined_df)
+    if pairs is None:
+        pairs = pair_results(potential_sniper_df, combined_df, skip_invalid=False)
+    # Figures stay numpy scalars, as in the old per-row loop, so round() rounds the same way
+    for row in pairs.itertuples(index=False):
+        remaining = np.float64(row.remaining_tokens)
+        unrealized = remaining * latest_prices.price(row.token_name)
+
+        results.append({
+            "Wallet Address": row.maker,
+            "Net PnL ($)": round(np.float64(row.realized_pnl), 4),
+            "Unrealized PnL ($)": round(unrealized, 4),
+            "Remaining Tokens": float(f"{remaining:.4f}"),
+            "Txn Count\n(BUY)": row.buy_txn_count,
+            "Txn Count\n(SELL)": row.sell_txn_count,
+            "First Buy Time": row.first_buy_time,
+            "Last Sell Time": row.last_sell_time,
+            "Average Buy Price ($)": round(np.float64(row.avg_buy_price), 4),
+            "Average Sell Price ($)": round(np.float64(row.avg_sell_price), 4),
+            "Total Tax Paid": round(np.float64(row.total_tax_paid), 4),
+            "Total Tx Fees Paid (ETH)": round(np.float64(row.total_transaction_fee_paid), 4)
+        })
+
+    return pd.DataFrame(results)
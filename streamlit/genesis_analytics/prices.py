@@ -0,0 +1,56 @@
+"""Latest genesis price per token, used to mark remaining sniper holdings to market."""
+import threading
+
+import pandas as pd
+
+
+class LatestPriceIndex:
+    """token -> last `genesis_usdc_price` with its timestamp and block.
+
+    Built once from a frame and then fed only the new swaps of each refresh. The latest
+    swap is the one with the highest `timestamp`; on a tie the earlier row wins, the same
+    row `sort_values(by='timestamp', ascending=False).head(1)` picked.
+    """
+
+    def __init__(self):
+        self.latest = {}  # token -> {"timestamp", "blockNumber", "price"}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"latest": dict(self.latest)}
+
+    def __setstate__(self, state):
+        self.latest = state["latest"]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df):
+        index = cls()
+        index.update(df)
+        return index
+
+    def update(self, df):
+        """Fold new swaps into the index; an entry only moves to a strictly later timestamp"""
+        if df is None or df.empty:
+            return
+        df = df.reset_index(drop=True)
+        timed = df[df['timestamp'].notna()]
+        rows = timed.loc[timed.groupby('token_name', sort=False, observed=True)['timestamp'].idxmax()]
+        # Tokens whose swaps all lack a timestamp fall back to their first row, as the sort did
+        untimed = df[~df['token_name'].isin(rows['token_name'])].drop_duplicates(subset='token_name')
+        rows = pd.concat([rows, untimed])
+
+        blocks = rows['blockNumber'] if 'blockNumber' in rows.columns else pd.Series(None, index=rows.index)
+        with self._lock:
+            for token, ts, block, price in zip(rows['token_name'].tolist(), rows['timestamp'].tolist(),
+                                               blocks.tolist(), rows['genesis_usdc_price'].tolist()):
+                current = self.latest.get(token)
+                if current is None or (pd.notna(ts) and (pd.isna(current["timestamp"]) or ts > current["timestamp"])):
+                    self.latest[token] = {"timestamp": ts, "blockNumber": block, "price": price}
+
+    def price(self, token, default=0.0):
+        entry = self.latest.get(token)
+        return default if entry is None else entry["price"]
+
+    def to_frame(self):
+        return pd.DataFrame.from_dict(self.latest, orient="index").rename_axis("token_name").reset_index()
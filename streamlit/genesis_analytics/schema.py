@@ -0,0 +1,69 @@
+"""Compact in-memory schema of the combined swap frame.
+
+Maker addresses, token names and swap types repeat across millions of rows, so they are
+held as categoricals: one dictionary of distinct strings plus small integer codes per row.
+Block numbers and epoch-second timestamps fit in uint32. Categories are kept sorted, so
+sorting and grouping by them orders rows exactly as the plain strings did. Amounts and
+prices stay float64; narrowing them would change the PnL figures.
+
+`finalize_swaps` applies the schema as swaps are ingested, and `concat_swaps` merges the
+per-token dictionaries, because a plain `pd.concat` of differing categoricals falls back
+to object strings.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CATEGORY_COLUMNS = ["maker", "token_name", "swapType"]
+INTEGER_COLUMNS = {"blockNumber": np.uint32, "timestamp": np.uint32}
+
+
+def _fits(values, dtype):
+    """Every value present, integral and within the range of `dtype`"""
+    if values.isna().any():
+        return False
+    info = np.iinfo(dtype)
+    return bool((values % 1 == 0).all() and values.min() >= info.min and values.max() <= info.max)
+
+
+def compact_swaps(df):
+    """Cast the schema columns of a swap frame to their compact dtypes, in place; returns the frame.
+
+    An integer column with missing or out-of-range values keeps its numeric dtype.
+    """
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in df.columns and len(df) and df[col].dtype != dtype:
+            values = pd.to_numeric(df[col], errors="coerce")
+            if _fits(values, dtype):
+                df[col] = values.astype(dtype)
+    return df
+
+
+def concat_swaps(frames):
+    """Concatenate compact swap frames into one compact frame (None when there are none)"""
+    frames = list(frames)
+    if not frames:
+        return None
+    columns = list(dict.fromkeys(col for df in frames for col in df.columns))
+    shared = [col for col in CATEGORY_COLUMNS
+              if all(col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype) for df in frames)]
+    combined = pd.concat([df.drop(columns=shared) for df in frames], ignore_index=True)
+    for col in shared:
+        combined[col] = union_categoricals([df[col] for df in frames], sort_categories=True)
+    return compact_swaps(combined[columns])
+
+
+def memory_mb(df):
+    """Deep memory of a frame in MB, strings included"""
+    return 0.0 if df is None else float(df.memory_usage(deep=True).sum()) / 2 ** 20
+
+
+def memory_report(frames):
+    """Rows and deep memory of each pipeline stage's frame, given as {stage: frame}"""
+    return pd.DataFrame([
+        {"stage": stage, "rows": 0 if df is None else len(df), "memory_mb": round(memory_mb(df), 2)}
+        for stage, df in frames.items()
+    ], columns=["stage", "rows", "memory_mb"])
@@ -0,0 +1,94 @@
+"""Substring search over maker addresses and block numbers of one token's swaps.
+
+Each index keeps the distinct values once, and a sorted array of all their suffixes
+(a suffix array). A substring query is a prefix of some suffix, so the matching values
+come from two binary searches over that array; their rows come from per-value postings.
+Lookups cost O(log n) plus the size of the answer, independent of how many swaps the
+token has.
+"""
+import numpy as np
+import pandas as pd
+
+
+class SuffixIndex:
+    """Substring lookup from a query to the row ids whose value contains it"""
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna(""))
+        self.n = len(codes)
+        self._codes = codes
+        order = np.argsort(codes, kind="stable")
+        self._rows = order
+        self._row_bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+
+        encoded = np.char.encode(np.array([str(value).lower() for value in uniques], dtype=str), "utf-8")
+        width = max(encoded.dtype.itemsize, 1)
+        lengths = np.char.str_len(encoded)
+        chars = np.zeros((len(encoded), width), dtype=np.uint8)
+        if len(encoded):
+            chars[:, :] = np.frombuffer(encoded.tobytes(), dtype=np.uint8).reshape(len(encoded), width)
+
+        suffixes, owners = [], []
+        for offset in range(width):
+            live = np.flatnonzero(lengths > offset)
+            if not len(live):
+                break
+            shifted = np.zeros((len(live), width), dtype=np.uint8)
+            shifted[:, :width - offset] = chars[live, offset:]
+            suffixes.append(shifted.view(f"S{width}").ravel())
+            owners.append(live)
+        suffixes = np.concatenate(suffixes) if suffixes else np.empty(0, dtype="S1")
+        owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.int64)
+        sort = np.argsort(suffixes, kind="stable")
+        self._suffixes = suffixes[sort]
+        self._owners = owners[sort].astype(np.int32)
+        self._width = width
+        self._unique_count = len(uniques)
+
+    def lookup(self, query):
+        """Sorted row ids whose value contains `query` (case-insensitive)"""
+        query = query.strip().lower().encode()
+        if not query:
+            return np.arange(self.n)
+        if len(query) > self._width:
+            return np.empty(0, dtype=np.int64)
+        # Suffixes starting with `query` sit between it and its successor; both keep the
+        # array's width so searchsorted never has to cast the suffix array
+        start = np.searchsorted(self._suffixes, query, side="left")
+        upper = query.rstrip(b"\xff")
+        if upper:
+            stop = np.searchsorted(self._suffixes, upper[:-1] + bytes([upper[-1] + 1]), side="left")
+        else:
+            stop = len(self._suffixes)
+        hit = np.zeros(self._unique_count, dtype=bool)
+        hit[self._owners[start:stop]] = True
+        owners = np.flatnonzero(hit)
+        starts = self._row_bounds[owners]
+        counts = self._row_bounds[owners + 1] - starts
+        if counts.sum() > self.n // 8:
+            return np.flatnonzero(hit[self._codes])
+        # Concatenate the postings of the matching values without a Python loop
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return np.sort(self._rows[positions])
+
+
+class MakerBlockSearch:
+    """The "Search BLOCK or MAKER" box: maker substrings, plus block-number substrings for digits"""
+
+    def __init__(self, makers, blocks):
+        self.makers = SuffixIndex(makers)
+        blocks = pd.to_numeric(pd.Series(blocks), errors="coerce")
+        self.blocks = SuffixIndex(blocks.astype("Int64").astype(str).where(blocks.notna(), ""))
+
+    def lookup(self, query):
+        query = (query or "").strip().lower()
+        rows = self.makers.lookup(query)
+        if not query.isdigit():
+            return rows
+        block_rows = self.blocks.lookup(query)
+        if len(rows) + len(block_rows) > self.makers.n // 8:
+            hit = np.zeros(self.makers.n, dtype=bool)
+            hit[rows] = True
+            hit[block_rows] = True
+            return np.flatnonzero(hit)
+        return np.union1d(rows, block_rows)
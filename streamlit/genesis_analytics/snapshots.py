@@ -0,0 +1,114 @@
+"""Versioned snapshots of the sniper PnL table written by the background worker.
+
+A snapshot is published in two steps: the rows are written first, then a manifest entry
+marks the version complete. Readers only ever look at the latest complete manifest, so a
+page never sees a half-written table.
+
+A snapshot older than MAX_SNAPSHOT_AGE seconds (SNIPER_PNL_MAX_AGE, by default twice the
+worker interval SNIPER_PNL_INTERVAL) is stale: the worker has stopped or fallen behind,
+and the dashboards compute the table themselves instead.
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+SNAPSHOT_COLLECTION = "sniper_pnl"
+MANIFEST_COLLECTION = "sniper_pnl_snapshots"
+KEEP_SNAPSHOTS = 3
+SNAPSHOT_INTERVAL = float(os.getenv("SNIPER_PNL_INTERVAL", 300))
+MAX_SNAPSHOT_AGE = float(os.getenv("SNIPER_PNL_MAX_AGE", 2 * SNAPSHOT_INTERVAL))
+
+
+def new_version():
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def snapshot_time(manifest):
+    """UTC time a snapshot was published (Mongo returns it naive, the file manifest as ISO text)"""
+    created_at = pd.Timestamp(manifest["created_at"])
+    return created_at.tz_localize("UTC") if created_at.tzinfo is None else created_at.tz_convert("UTC")
+
+
+def is_fresh(manifest, max_age=MAX_SNAPSHOT_AGE, now=None):
+    """Whether the snapshot is recent enough to show instead of computing the table live"""
+    now = pd.Timestamp(now or datetime.now(timezone.utc))
+    return (now - snapshot_time(manifest)).total_seconds() <= max_age
+
+
+def _to_records(df):
+    # NaT/NaN become None and numpy scalars python ones, so BSON can encode them
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+class MongoSnapshotSink:
+    """Snapshots stored as one document per row in `sniper_pnl`, with manifests in `sniper_pnl_snapshots`"""
+
+    def __init__(self, db, keep=KEEP_SNAPSHOTS):
+        self.rows = db[SNAPSHOT_COLLECTION]
+        self.manifests = db[MANIFEST_COLLECTION]
+        self.keep = keep
+
+    def publish(self, pnl_df, meta):
+        version = new_version()
+        self.rows.create_index("snapshot")
+        records = _to_records(pnl_df)
+        for record in records:
+            record["snapshot"] = version
+        if records:
+            self.rows.insert_many(records)
+        self.manifests.insert_one({**meta, "snapshot": version, "rows": len(records),
+                                   "created_at": datetime.now(timezone.utc)})
+        self._prune()
+        return version
+
+    def _prune(self):
+        old = [m["snapshot"] for m in self.manifests.find({}, {"snapshot": 1}).sort("snapshot", -1).skip(self.keep)]
+        if old:
+            self.manifests.delete_many({"snapshot": {"$in": old}})
+            self.rows.delete_many({"snapshot": {"$in": old}})
+
+    def latest(self):
+        """Return (pnl_df, manifest) for the newest complete snapshot, or None"""
+        manifest = self.manifests.find_one({}, {"_id": 0}, sort=[("snapshot", -1)])
+        if manifest is None:
+            return None
+        pnl_df = pd.DataFrame(list(self.rows.find({"snapshot": manifest["snapshot"]}, {"_id": 0, "snapshot": 0}).sort("_id", 1)))
+        return pnl_df, manifest
+
+
+class FileSnapshotSink:
+    """Snapshots stored as Parquet files in a directory, with `latest.json` pointing at the newest"""
+
+    def __init__(self, directory, keep=KEEP_SNAPSHOTS):
+        self.directory = directory
+        self.keep = keep
+
+    def publish(self, pnl_df, meta):
+        os.makedirs(self.directory, exist_ok=True)
+        version = new_version()
+        name = f"{SNAPSHOT_COLLECTION}-{version}.parquet"
+        pnl_df.to_parquet(os.path.join(self.directory, name), index=False)
+        manifest = {**meta, "snapshot": version, "rows": len(pnl_df), "file": name,
+                    "created_at": datetime.now(timezone.utc).isoformat()}
+        tmp = os.path.join(self.directory, "latest.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp, os.path.join(self.directory, "latest.json"))
+        self._prune()
+        return version
+
+    def _prune(self):
+        files = sorted(f for f in os.listdir(self.directory)
+                       if f.startswith(SNAPSHOT_COLLECTION + "-") and f.endswith(".parquet"))
+        for name in files[:-self.keep]:
+            os.remove(os.path.join(self.directory, name))
+
+    def latest(self):
+        path = os.path.join(self.directory, "latest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            manifest = json.load(f)
+        return pd.read_parquet(os.path.join(self.directory, manifest["file"])), manifest
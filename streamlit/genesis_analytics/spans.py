@@ -0,0 +1,160 @@
+"""Timing spans around the stages of the pages and commands.
+
+    with spans.span("load_swap_data", cached=True) as record:
+        df = load_swap_data(token)
+        record["rows_out"] = spans.rows(df)
+
+A span records its wall time, rows in and out, the documents and bytes Mongo sent while it
+was open, and for cached stages whether the cache answered ("hit") or the function body
+ran ("miss"; the body calls `cache_miss()`). Every span is kept for the current page run,
+which the performance panel (`?perf=1`) lists; with PERF_LOG=1 it is also printed as one
+JSON line when it closes.
+
+Threads working for a page run (concurrent fetches) record into it through `current_run`
+and `join_run`.
+
+Mongo traffic comes from a command listener on the shared client, counted process-wide,
+so a span can include the reads of other sessions or of spans open at the same time.
+Counting bytes re-encodes every reply, so it stays off unless PERF_COUNT_BYTES is set (for
+the whole process) or a run asks for it (a page opened with `?perf=1`, for the replies to
+that run's own threads only); document counts are always kept.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+from bson import encode
+from pymongo import monitoring
+
+LOG = os.getenv("PERF_LOG", "0") != "0"  # print every closed span as a JSON line
+COLUMNS = ["stage", "rows_in", "rows_out", "seconds", "documents", "bytes", "cache", "depth"]
+
+_local = threading.local()
+
+
+class MongoTraffic(monitoring.CommandListener):
+    """Documents and bytes received from Mongo by this process.
+
+    Listeners are called on the thread that ran the command, so bytes are counted for
+    threads whose run asked for them (or for all, with PERF_COUNT_BYTES).
+    """
+
+    def __init__(self):
+        self.documents = 0
+        self.bytes = 0
+        self.count_bytes = bool(os.getenv("PERF_COUNT_BYTES"))
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        reply = event.reply
+        cursor = reply.get("cursor") if isinstance(reply, dict) else None
+        if cursor is not None:
+            documents = len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+        else:
+            documents = len(reply.get("values", [])) if isinstance(reply, dict) else 0
+        size = len(encode(reply)) if counting_bytes() else 0
+        with self._lock:
+            self.documents += documents
+            self.bytes += size
+
+    def failed(self, event):
+        pass
+
+    def totals(self):
+        with self._lock:
+            return self.documents, self.bytes
+
+
+MONGO_TRAFFIC = MongoTraffic()
+
+
+def counting_bytes():
+    """Whether replies to this thread have their bytes counted"""
+    return MONGO_TRAFFIC.count_bytes or getattr(_local, "count_bytes", False)
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def start_run(page, count_bytes=False):
+    """Begin a new page run; spans opened from now on belong to it.
+
+    Threads that never start or join a run (the worker, the command line) only log their spans.
+    `count_bytes` turns byte counting on for this run.
+    """
+    _stack().clear()
+    _local.records = []
+    _local.page = page
+    _local.count_bytes = count_bytes
+
+
+def current_run():
+    """This thread's run, for threads doing work for it to `join_run`"""
+    return getattr(_local, "page", None), getattr(_local, "records", None), getattr(_local, "count_bytes", False)
+
+
+def join_run(run):
+    """Record this thread's spans in `run` (from `current_run`) from now on"""
+    _stack().clear()
+    _local.page, _local.records, _local.count_bytes = run
+
+
+def run_records():
+    """Spans opened during the current run of this thread, in opening order (nested ones after their parent)"""
+    return list(getattr(_local, "records", None) or [])
+
+
+def run_frame():
+    """The current run's spans as a table, for the performance panel"""
+    df = pd.DataFrame(run_records(), columns=COLUMNS)
+    for col in ["rows_in", "rows_out", "documents", "bytes"]:
+        df[col] = pd.to_numeric(df[col]).astype("Int64")
+    return df
+
+
+def rows(value):
+    """Row count of a frame or sequence, None for anything else"""
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def cache_miss():
+    """Mark the innermost open cached span as computed rather than served from the cache"""
+    for record in reversed(_stack()):
+        if record["cache"] is not None:
+            record["cache"] = "miss"
+            return
+
+
+@contextlib.contextmanager
+def span(stage, rows_in=None, cached=False):
+    """Time a stage; the yielded record takes `rows_out` and any extra fields"""
+    stack = _stack()
+    record = {"page": getattr(_local, "page", None), "stage": stage, "rows_in": rows_in, "rows_out": None,
+              "cache": "hit" if cached else None, "depth": len(stack)}
+    documents, size = MONGO_TRAFFIC.totals()
+    start = time.perf_counter()
+    stack.append(record)
+    if getattr(_local, "records", None) is not None:
+        _local.records.append(record)
+    try:
+        yield record
+    finally:
+        stack.remove(record)
+        record["seconds"] = round(time.perf_counter() - start, 4)
+        end_documents, end_size = MONGO_TRAFFIC.totals()
+        record["documents"] = end_documents - documents
+        record["bytes"] = end_size - size if counting_bytes() else None
+        if LOG:
+            print(json.dumps({"event": "span", **record}, default=str))
@@ -0,0 +1,252 @@
+"""Loading of the per-token `<token>_swap` collections into one combined frame.
+
+Collections are discovered on the server rather than listed by hand, so a newly launched
+token is picked up without a code change. Each collection stores its amounts under
+token-prefixed names (`JARVIS_OUT_BeforeTax`); loading strips the prefix and brings every
+collection to the same `SWAP_COLUMNS` with numeric columns parsed, so the frames concatenate
+into one schema.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from genesis_analytics import spans
+from genesis_analytics.prices import LatestPriceIndex
+from genesis_analytics.schema import compact_swaps, concat_swaps
+
+SWAP_DB = "genesis_tokens_swap_info"
+
+# Collections known before discovery; used when the server does not allow listing collections
+SWAP_COLLECTIONS = ['jarvis_swap', 'afath_swap', 'pilot_swap', 'tian_swap', 'vgn_swap', 'badai_swap',
+                    'bolz_swap', 'trivi_swap', 'vruff_swap', 'wbug_swap', 'aispace_swap', 'wint_swap',
+                    'ling_swap', 'gloria_swap', 'light_swap', 'rwai_swap', 'nyko_swap', 'super_swap',
+                    'xllm2_swap', 'maneki_swap', 'whim_swap']
+
+
+# Amount columns, stored as `<TOKEN>_<column>` in each collection
+AMOUNT_COLUMNS = ["OUT_BeforeTax", "OUT_AfterTax", "IN_BeforeTax", "IN_AfterTax"]
+# Columns of the combined frame, the same for every token
+SWAP_COLUMNS = AMOUNT_COLUMNS + ["maker", "token_name", "swapType", "timestamp", "timestampReadable", "blockNumber",
+                                 "genesis_usdc_price", "transactionFee", "Tax_1pct"]
+NUMERIC_COLUMNS = AMOUNT_COLUMNS + ["timestamp", "blockNumber", "genesis_usdc_price", "transactionFee", "Tax_1pct"]
+
+# Collections fetched at once; every worker shares the process's pooled client
+LOAD_WORKERS = int(os.getenv("SWAP_LOAD_WORKERS", 8))
+# Seconds a discovered collection list is reused, as long as the pages cache `swap_progress`
+DISCOVERY_TTL = 600
+
+
+def discover_swap_collections(db):
+    """Every `<token>_swap` collection, in launch order from `swap_progress` (unknown tokens last, by name)"""
+    try:
+        names = [name for name in db.list_collection_names() if name.endswith("_swap")]
+    except Exception as e:
+        print(f"Error listing swap collections, using the known list: {e}")
+        return list(SWAP_COLLECTIONS)
+    launch = {}
+    for doc in db["swap_progress"].find({}, {"token_symbol": 1, "genesis_block": 1}):
+        block = pd.to_numeric(doc.get("genesis_block"), errors="coerce")
+        if doc.get("token_symbol") and pd.notna(block):
+            launch[f"{doc['token_symbol'].lower()}_swap"] = block
+    return sorted(names, key=lambda name: (name not in launch, launch.get(name, 0), name))
+
+
+def swap_projection(token_prefix):
+    """Build projection dict with correct prefixed column names"""
+    return {(token_prefix + col if col in AMOUNT_COLUMNS else col): 1 for col in SWAP_COLUMNS}
+
+
+def normalize_swaps(data, token_name, columns=None):
+    """Turn raw swap documents into a frame with the token prefix removed from amount columns.
+
+    Numeric columns that came back with mixed types are parsed; with `columns` the frame is
+    brought to exactly those columns, missing ones filled with NaN.
+    """
+    token_prefix = token_name.upper() + "_"
+    df = pd.DataFrame(data)
+    df.drop(columns=['_id'], errors='ignore', inplace=True)
+    df.columns = [col.replace(token_prefix, '') if col.startswith(token_prefix) else col for col in df.columns]
+    df["token_name"] = token_name.upper()
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def finalize_swaps(df):
+    """Drop rows without fee or price, parse the readable timestamp and apply the compact schema"""
+    df = df.dropna(subset=['transactionFee'])
+    df = df.dropna(subset=['genesis_usdc_price'])
+    df['timestampReadable'] = pd.to_datetime(df['timestampReadable'])
+    return compact_swaps(df)
+
+
+class IncrementalSwapStore:
+    """Resident combined swap frame kept current through per-collection blockNumber high-water marks.
+
+    The first refresh reads every collection in full. Later refreshes only ask Mongo for
+    documents at or above the highest block already seen, so their cost follows the number
+    of new swaps. The boundary block is re-read because a block can be ingested in several
+    writes; its rows are replaced rather than appended.
+
+    With a `SwapMirror`, a cold store is seeded from the local Parquet files and Mongo is
+    only asked for what was ingested after the last mirror sync.
+
+    Without `collections` the store follows `discover_swap_collections`, checked again
+    every `DISCOVERY_TTL` seconds, so a new token's collection is loaded on the next
+    refresh after it appears.
+
+    Collections are fetched concurrently on a thread pool of `max_workers` sharing the
+    store's client; per-collection timing and row counts of the last refresh are kept in
+    `last_refresh_stats`.
+
+    `min_block` and `max_block` limit the store to swaps in that block range (inclusive),
+    for backfills; the range is part of every Mongo query and mirror read.
+
+    `latest_prices` is a LatestPriceIndex fed with the new rows of every refresh.
+    """
+
+    def __init__(self, db, collections=None, mirror=None, max_workers=LOAD_WORKERS, min_block=None, max_block=None):
+        self.db = db
+        self.discover = collections is None
+        self.collections = [] if collections is None else list(collections)
+        self._discovered_at = None
+        self.mirror = mirror
+        self.max_workers = max_workers
+        self.min_block = min_block
+        self.max_block = max_block
+        self.last_refresh_stats = pd.DataFrame(columns=["collection", "rows_fetched", "rows_resident", "seconds"])
+        self.high_water = {}      # collection -> highest blockNumber seen
+        self.boundary_counts = {}  # collection -> raw documents at the high-water block
+        self.frames = {}          # collection -> finalized frame
+        self.combined = None
+        self.latest_prices = LatestPriceIndex()
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Fetch swaps newer than the high-water marks and return the combined frame (None if empty)"""
+        with self._lock:
+            previous = self.collections
+            self._discover_collections()
+            # Each worker only touches its own collection's entries in the per-collection dicts, and
+            # joins the caller's span run so its replies count towards it
+            with ThreadPoolExecutor(max_workers=self.max_workers, initializer=spans.join_run,
+                                    initargs=(spans.current_run(),)) as pool:
+                results = list(pool.map(self._timed_refresh, self.collections))
+            changed = self.collections != previous or any(col_changed for col_changed, _ in results)
+            self.last_refresh_stats = pd.DataFrame([stats for _, stats in results],
+                                                   columns=self.last_refresh_stats.columns)
+            slowest = self.last_refresh_stats.sort_values(by="seconds", ascending=False).head(3)
+            print("Swap refresh (slowest):", ", ".join(
+                f"{r.collection} {r.rows_fetched} rows {r.seconds:.2f}s" for r in slowest.itertuples()))
+            if changed or self.combined is None:
+                self.combined = concat_swaps(self.frames[c] for c in self.collections if c in self.frames)
+                if self.combined is not None and self.combined.empty:
+                    self.combined = None
+            return self.combined
+
+    @property
+    def version(self):
+        """Per collection (high-water block, resident rows); changes whenever the combined frame does"""
+        return tuple((col, self.high_water.get(col), len(self.frames[col]) if col in self.frames else 0)
+                     for col in self.collections)
+
+    def _discover_collections(self):
+        if not self.discover:
+            return
+        now = time.monotonic()
+        if self._discovered_at is None or now - self._discovered_at >= DISCOVERY_TTL:
+            self.collections = discover_swap_collections(self.db)
+            self._discovered_at = now
+
+    def _seed_from_mirror(self, col_name, token_name):
+        manifest = self.mirror.manifest(token_name)
+        if manifest is None or manifest["high_water"] is None:
+            return False
+        projection = swap_projection(token_name.upper() + "_")
+        df = self.mirror.read(token_name, columns=list(projection), min_block=self.min_block, max_block=self.max_block)
+        if len(df):  # a block range can leave nothing of the mirror
+            self.frames[col_name] = finalize_swaps(normalize_swaps(df, token_name, SWAP_COLUMNS)).reset_index(drop=True)
+            self.latest_prices.update(self.frames[col_name])
+        self.high_water[col_name] = manifest["high_water"]
+        self.boundary_counts[col_name] = manifest["boundary_count"]
+        return True
+
+    def _timed_refresh(self, col_name):
+        start = time.perf_counter()
+        changed, rows_fetched = self._refresh_collection(col_name)
+        resident = self.frames.get(col_name)
+        return changed, {
+            "collection": col_name,
+            "rows_fetched": rows_fetched,
+            "rows_resident": 0 if resident is None else len(resident),
+            "seconds": round(time.perf_counter() - start, 4),
+        }
+
+    def _refresh_collection(self, col_name):
+        token_name = col_name.replace('_swap', '')
+        seeded = False
+        if col_name not in self.high_water and self.mirror is not None:
+            seeded = self._seed_from_mirror(col_name, token_name)
+        hwm = self.high_water.get(col_name)
+        if hwm is not None and self.min_block is not None and hwm < self.min_block:
+            hwm = None  # nothing resident inside the range yet
+        data = list(self.db[col_name].find(self._block_query(hwm), swap_projection(token_name.upper() + "_")))
+        if not data:
+            return seeded, 0
+
+        df = normalize_swaps(data, token_name, SWAP_COLUMNS)
+        if "blockNumber" not in df.columns or df["blockNumber"].isna().all():
+            # Without block numbers there is nothing to anchor on, keep the full read
+            self.frames[col_name] = finalize_swaps(df)
+            self.latest_prices.update(self.frames[col_name])
+            return True, len(data)
+
+        blocks = df["blockNumber"]
+        new_hwm = blocks.max()
+        new_hwm = new_hwm.item() if hasattr(new_hwm, "item") else new_hwm  # BSON can't encode numpy scalars
+        if hwm is not None and new_hwm == hwm and len(df) == self.boundary_counts.get(col_name):
+            return seeded, len(data)
+
+        self.high_water[col_name] = new_hwm
+        self.boundary_counts[col_name] = int((blocks == new_hwm).sum())
+        new_rows = finalize_swaps(df)
+        self.latest_prices.update(new_rows)
+
+        resident = self.frames.get(col_name)
+        if resident is None or hwm is None:
+            self.frames[col_name] = new_rows.reset_index(drop=True)
+        else:
+            resident = resident[~(resident["blockNumber"] >= hwm)]
+            self.frames[col_name] = concat_swaps([resident, new_rows])
+        return True, len(data)
+
+
+    def _block_query(self, hwm):
+        """Filter on blockNumber: at or above the high-water mark, within the store's range"""
+        bounds = {}
+        start = hwm if hwm is not None else self.min_block
+        if start is not None:
+            bounds["$gte"] = start
+        if self.max_block is not None:
+            bounds["$lte"] = self.max_block
+        return {"blockNumber": bounds} if bounds else {}
+
+
+def load_launch_blocks(db, combined_df=None):
+    """Launch block per token symbol from `Personas`, falling back to each token's first swap block"""
+    try:
+        launch_df = pd.DataFrame(list(db["Personas"].find({}, {"symbol": 1, "blockNumber": 1})))
+        if not launch_df.empty and 'symbol' in launch_df.columns and 'blockNumber' in launch_df.columns:
+            return dict(zip(launch_df['symbol'], launch_df['blockNumber']))
+        print("Warning: Could not fetch launch info from Personas collection, using fallback method")
+    except Exception as e:
+        print(f"Error fetching launch info: {e}")
+    if combined_df is None:
+        return {}
+    return combined_df.sort_values(by='blockNumber').groupby('token_name', observed=True)['blockNumber'].first().to_dict()
@@ -0,0 +1,201 @@
+"""Deterministic synthetic swap data, for running the sniper pipeline without production Mongo.
+
+`generate` builds raw `<token>_swap` documents as the ingester writes them (token-prefixed
+amounts, readable timestamps, fees and prices): background trading by a pool of makers,
+plus for a `sniper_fraction` of them large buy bursts within the launch window that are
+sold again within minutes, so detection has real snipers to find. The same arguments
+always give the same data.
+
+`populate` writes the data into any pymongo-like database (mongomock included), and
+`FrameDatabase` serves it straight from the frames, answering the `find` queries the
+loaders send, for sizes where a document store stand-in is too slow.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from genesis_analytics.detection import LARGE_BUY_THRESHOLD, LAUNCH_BLOCK_WINDOW, MIN_TRANSACTION_FEE, QUICK_SELL_SECONDS
+
+SECONDS_PER_BLOCK = 2
+FIRST_LAUNCH_BLOCK = 25_000_000
+FIRST_LAUNCH_TS = 1_735_689_600  # 2025-01-01
+
+
+def maker_addresses(count, seed=0):
+    return np.array(["0x" + hashlib.sha1(f"{seed}-{i}".encode()).hexdigest() for i in range(count)], dtype=object)
+
+
+def token_swaps(symbol, swaps, makers, launch_block, sniper_fraction=0.02, burst_size=3, seed=0):
+    """Raw swap documents of one token as a frame, in block order"""
+    rng = np.random.default_rng([seed, int(hashlib.sha1(symbol.encode()).hexdigest()[:8], 16)])
+    snipers = rng.choice(len(makers), size=max(1, int(len(makers) * sniper_fraction)), replace=False)
+
+    # Sniper bursts: `burst_size` buys inside the launch window adding up past the large-buy
+    # threshold, then one or two sells well within the quick-sell window
+    burst_blocks = launch_block + np.sort(rng.integers(0, LAUNCH_BLOCK_WINDOW, size=(len(snipers), burst_size)), axis=1)
+    sell_count = rng.integers(1, 3, size=len(snipers))
+    sell_blocks = [burst_blocks[i, -1] + np.sort(rng.integers(1, QUICK_SELL_SECONDS // SECONDS_PER_BLOCK // 2, count))
+                   for i, count in enumerate(sell_count)]
+    sniper_rows = pd.DataFrame({
+        "maker_id": np.concatenate([np.repeat(snipers, burst_size), np.repeat(snipers, sell_count)]),
+        "blockNumber": np.concatenate([burst_blocks.ravel(), np.concatenate(sell_blocks)]),
+        "swapType": ["buy"] * burst_blocks.size + ["sell"] * int(sell_count.sum()),
+        "amount": np.concatenate([
+            rng.uniform(1.2, 2.0, burst_blocks.size) * LARGE_BUY_THRESHOLD / burst_size,
+            rng.uniform(0.2, 1.0, int(sell_count.sum())) * LARGE_BUY_THRESHOLD / 2,
+        ]),
+        "transactionFee": rng.uniform(2, 20, burst_blocks.size + int(sell_count.sum())) * MIN_TRANSACTION_FEE,
+    }).head(swaps)
+
+    # Background trading: a few makers trade a lot, most a little
+    rest = swaps - len(sniper_rows)
+    background = pd.DataFrame({
+        "maker_id": np.minimum(rng.pareto(1.2, rest) * len(makers) / 20, len(makers) - 1).astype(np.int64),
+        "blockNumber": launch_block + rng.integers(0, max(rest // 2, LAUNCH_BLOCK_WINDOW * 2), rest),
+        "swapType": np.where(rng.random(rest) < 0.55, "buy", "sell"),
+        "amount": rng.exponential(5_000, rest),
+        "transactionFee": rng.uniform(0.05, 1.5, rest) * MIN_TRANSACTION_FEE,
+    })
+    df = pd.concat([sniper_rows, background], ignore_index=True)
+    df = df.sort_values("blockNumber", kind="stable").reset_index(drop=True)
+    n = len(df)
+
+    ts = FIRST_LAUNCH_TS + (df["blockNumber"].to_numpy() - FIRST_LAUNCH_BLOCK) * SECONDS_PER_BLOCK
+    virtual_usd = 1.0 + 0.05 * np.sin(np.arange(n) / 5_000)
+    price = 0.0001 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    buy = df["swapType"].to_numpy() == "buy"
+    amount = df["amount"].to_numpy()
+    token = symbol.upper()
+    readable = np.char.replace(np.datetime_as_string(ts.astype("datetime64[s]")), "T", " ")
+    return pd.DataFrame({
+        "blockNumber": df["blockNumber"].to_numpy(),
+        "txHash": np.char.add("0x", np.frombuffer(rng.bytes(32 * n).hex().encode(), dtype="S64").astype(str)).astype(object),
+        "maker": makers[df["maker_id"].to_numpy()],
+        "swapType": df["swapType"].to_numpy(),
+        "label": np.where(rng.random(n) < 0.8, "Genesis", "Uniswap"),
+        "timestamp": ts,
+        "timestampReadable": readable,
+        "genesis_token_symbol": token,
+        f"{token}_OUT": np.where(buy, amount, np.nan),
+        f"{token}_IN": np.where(buy, np.nan, amount),
+        f"{token}_OUT_BeforeTax": np.where(buy, amount, np.nan),
+        f"{token}_OUT_AfterTax": np.where(buy, amount * 0.99, np.nan),
+        f"{token}_IN_BeforeTax": np.where(buy, np.nan, amount),
+        f"{token}_IN_AfterTax": np.where(buy, np.nan, amount * 0.99),
+        "Virtual_IN": np.where(buy, amount * price / virtual_usd, np.nan),
+        "Virtual_OUT": np.where(buy, np.nan, amount * price / virtual_usd),
+        "Tax_1pct": amount * 0.01,
+        "transactionFee": df["transactionFee"].to_numpy(),
+        "genesis_usdc_price": price,
+        "genesis_virtual_price": price / virtual_usd,
+        "virtual_usdc_price": virtual_usd,
+    })
+
+
+def generate(tokens=3, swaps_per_token=10_000, makers=1_000, sniper_fraction=0.02, burst_size=3,
+             launch_spacing=50_000, seed=0):
+    """Raw swaps per token symbol and the launch block of each token.
+
+    Tokens launch `launch_spacing` blocks apart and share one pool of `makers` addresses.
+    """
+    pool = maker_addresses(makers, seed)
+    swaps, launch_blocks = {}, {}
+    for i in range(tokens):
+        symbol = f"SYN{i}"
+        launch_blocks[symbol] = FIRST_LAUNCH_BLOCK + i * launch_spacing
+        swaps[symbol] = token_swaps(symbol, swaps_per_token, pool, launch_blocks[symbol],
+                                    sniper_fraction=sniper_fraction, burst_size=burst_size, seed=seed)
+    return swaps, launch_blocks
+
+
+def _records(df):
+    """Documents without the fields that are missing, as Mongo stores them"""
+    columns = df.columns.tolist()
+    return [{col: value for col, value in zip(columns, row) if value == value}
+            for row in df.itertuples(index=False, name=None)]
+
+
+def metadata_frames(launch_blocks):
+    """`swap_progress` and `Personas` rows for the synthetic tokens"""
+    progress = pd.DataFrame({"token_symbol": list(launch_blocks), "genesis_block": list(launch_blocks.values())})
+    personas = pd.DataFrame({"symbol": list(launch_blocks), "blockNumber": list(launch_blocks.values())})
+    return {"swap_progress": progress, "Personas": personas}
+
+
+def populate(db, swaps, launch_blocks):
+    """Write the synthetic collections into a pymongo-like database"""
+    for symbol, df in swaps.items():
+        db[f"{symbol.lower()}_swap"].insert_many(_records(df))
+    for name, df in metadata_frames(launch_blocks).items():
+        db[name].insert_many(_records(df))
+
+
+class FrameCollection:
+    """Read-only collection over a frame, for the equality and range filters the loaders use"""
+
+    OPERATORS = {
+        "$gte": lambda column, value: column >= value,
+        "$gt": lambda column, value: column > value,
+        "$lte": lambda column, value: column <= value,
+        "$lt": lambda column, value: column < value,
+        "$ne": lambda column, value: column.notna() if value is None else column != value,
+        "$in": lambda column, value: column.isin(value),
+    }
+
+    def __init__(self, df):
+        self.df = df
+
+    def _mask(self, filter):
+        mask = np.ones(len(self.df), dtype=bool)
+        for field, condition in (filter or {}).items():
+            if field not in self.df.columns:
+                column = pd.Series(np.nan, index=self.df.index)
+            else:
+                column = self.df[field]
+            if isinstance(condition, dict):
+                for op, value in condition.items():
+                    if op not in self.OPERATORS:
+                        raise NotImplementedError(f"FrameCollection does not support {op}")
+                    mask &= self.OPERATORS[op](column, value).to_numpy()
+            else:
+                mask &= (column == condition).to_numpy()
+        return mask
+
+    def _project(self, df, projection):
+        if projection:
+            included = [field for field, keep in projection.items() if keep and field in df.columns]
+            if included:
+                df = df[included]
+        return df
+
+    def find(self, filter=None, projection=None, sort=None, limit=0):
+        df = self._project(self.df[self._mask(filter)], projection)
+        if sort:
+            df = df.sort_values([field for field, _ in sort], ascending=[direction > 0 for _, direction in sort],
+                                kind="stable")
+        if limit:
+            df = df.head(limit)
+        return _records(df)
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        docs = self.find(filter, projection, sort, limit=1)
+        return docs[0] if docs else None
+
+    def estimated_document_count(self):
+        return len(self.df)
+
+
+class FrameDatabase:
+    """In-process stand-in for the swap database, serving raw swap frames (synthetic or mirrored)"""
+
+    def __init__(self, swaps, launch_blocks):
+        self.collections = {f"{symbol.lower()}_swap": FrameCollection(df) for symbol, df in swaps.items()}
+        for name, df in metadata_frames(launch_blocks).items():
+            self.collections[name] = FrameCollection(df)
+
+    def list_collection_names(self):
+        return list(self.collections)
+
+    def __getitem__(self, name):
+        return self.collections.get(name) or FrameCollection(pd.DataFrame())
@@ -0,0 +1,225 @@
+"""Paged transaction table for one token, with filters and sort evaluated by Mongo.
+
+Pages are read with keyset pagination: a page ends at the `(sort value, _id)` of its last
+row and the next page asks for rows strictly after it, so only the visible rows are ever
+fetched and deep pages cost the same as the first one. The default order is
+`(blockNumber, _id)`.
+
+Raw filters (type, label, time, search) run as the first `$match` so they can use the
+collection's indexes. Token amount, virtual amount and transaction value are derived
+server-side with `$addFields`, with missing amounts counted as 0 as the table always did
+and rounded to `AMOUNT_DECIMALS`. `derive_amounts` computes the same columns for a frame
+already in memory.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [50, 100, 250, 500]
+DEFAULT_PAGE_SIZE = 100
+AMOUNT_DECIMALS = 4
+
+# Fields computed by `derived_fields`; every other sort/range field is a raw document field
+DERIVED_FIELDS = ["token_amount", "virtual_amount", "tx_value"]
+TABLE_FIELDS = ["blockNumber", "txHash", "maker", "swapType", "label", "timestamp", "timestampReadable",
+                "token_amount", "virtual_amount", "genesis_usdc_price", "tx_value",
+                "genesis_virtual_price", "virtual_usdc_price"]
+
+
+def _amount(field):
+    """`field` as a double, numeric strings parsed and anything missing or unparseable 0"""
+    return {"$convert": {"input": f"${field}", "to": "double", "onError": 0, "onNull": 0}}
+
+
+def derived_fields(token, decimals=AMOUNT_DECIMALS):
+    """`$addFields` stage for the amount of the token and of VIRTUAL moved by each swap.
+
+    Rounded like `derive_amounts`, so sorts, ranges and bounds see the values the table shows.
+    """
+    token = token.upper()
+
+    def by_side(buy_field, sell_field):
+        return {"$switch": {"branches": [
+            {"case": {"$eq": ["$swapType", "buy"]}, "then": _amount(buy_field)},
+            {"case": {"$eq": ["$swapType", "sell"]}, "then": _amount(sell_field)},
+        ], "default": None}}
+
+    token_amount = {"$round": [by_side(f"{token}_OUT", f"{token}_IN"), decimals]}
+    return {"$addFields": {
+        "token_amount": token_amount,
+        "virtual_amount": {"$round": [by_side("Virtual_IN", "Virtual_OUT"), decimals]},
+        "tx_value": {"$round": [{"$multiply": [token_amount, _amount("genesis_usdc_price")]}, decimals]},
+    }}
+
+
+def _numeric(df, col):
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+
+
+def derive_amounts(df, token, decimals=AMOUNT_DECIMALS):
+    """Token amount, VIRTUAL amount and USD value of every swap in one vectorized pass.
+
+    Buys move `<TOKEN>_OUT` and `Virtual_IN`, sells `<TOKEN>_IN` and `Virtual_OUT`; other
+    rows get NaN. The value is the rounded token amount times `genesis_usdc_price`, as
+    the row-wise `extract_amount` table computed it.
+    """
+    token = token.upper()
+    swap_type = df["swapType"].to_numpy() if "swapType" in df.columns else np.full(len(df), None)
+    sides = [swap_type == "buy", swap_type == "sell"]
+
+    def by_side(buy_col, sell_col):
+        return np.select(sides, [_numeric(df, buy_col), _numeric(df, sell_col)], default=np.nan)
+
+    token_amount = np.round(by_side(f"{token}_OUT", f"{token}_IN"), decimals)
+    return pd.DataFrame({
+        "token_amount": token_amount,
+        "virtual_amount": np.round(by_side("Virtual_IN", "Virtual_OUT"), decimals),
+        "tx_value": np.round(token_amount * _numeric(df, "genesis_usdc_price"), decimals),
+    }, index=df.index)
+
+
+def transaction_filter(swap_type=None, label=None, start_ts=None, end_ts=None, search=None):
+    """`$match` document for the raw filters of the transaction panel"""
+    query = {}
+    if swap_type:
+        query["swapType"] = swap_type
+    if label:
+        query["label"] = label
+    if start_ts is not None or end_ts is not None:
+        query["timestamp"] = {}
+        if start_ts is not None:
+            query["timestamp"]["$gte"] = start_ts
+        if end_ts is not None:
+            query["timestamp"]["$lte"] = end_ts
+    search = (search or "").strip()
+    if search:
+        pattern = re.escape(search)
+        clauses = [{"maker": {"$regex": pattern, "$options": "i"}}]
+        if search.isdigit():
+            clauses.append({"$expr": {"$regexMatch": {"input": {"$toString": "$blockNumber"}, "regex": pattern}}})
+        query["$or"] = clauses
+    return query
+
+
+def range_filter(field, value_range):
+    if field is None or value_range is None:
+        return {}
+    return {field: {"$gte": value_range[0], "$lte": value_range[1]}}
+
+
+def keyset_filter(field, ascending, after):
+    """Rows strictly after `after = (value, _id)` in `(field, _id)` order; Mongo sorts nulls first"""
+    if after is None:
+        return {}
+    value, last_id = after
+    op, id_op = ("$gt", "$gt") if ascending else ("$lt", "$lt")
+    if value is None:
+        same = {field: None, "_id": {id_op: last_id}}
+        return {"$or": [same, {field: {"$ne": None}}]} if ascending else same
+    clauses = [{field: {op: value}}, {field: value, "_id": {id_op: last_id}}]
+    if not ascending:
+        clauses.append({field: None})
+    return {"$or": clauses}
+
+
+def _pipeline(token, query, range_field=None, value_range=None):
+    stages = [{"$match": query}] if query else []
+    stages.append(derived_fields(token))
+    if range_field is not None and value_range is not None:
+        stages.append({"$match": range_filter(range_field, value_range)})
+    return stages
+
+
+def page_pipeline(token, query, sort_field="blockNumber", ascending=True, page_size=DEFAULT_PAGE_SIZE,
+                  after=None, range_field=None, value_range=None):
+    """Aggregation for one page plus a look-ahead row telling whether another page follows"""
+    direction = 1 if ascending else -1
+    derived = sort_field in DERIVED_FIELDS or range_field in DERIVED_FIELDS
+    keyset = keyset_filter(sort_field, ascending, after)
+    if derived:
+        stages = _pipeline(token, query, range_field, value_range)
+        if keyset:
+            stages.append({"$match": keyset})
+    else:
+        # Raw sort field: match and sort before deriving, so an index on the sort field can drive the page
+        stages = [{"$match": {"$and": [query, range_filter(range_field, value_range), keyset]}}]
+    stages += [{"$sort": {sort_field: direction, "_id": direction}}, {"$limit": page_size + 1}]
+    if not derived:
+        stages.append(derived_fields(token))
+    stages.append({"$project": {field: 1 for field in TABLE_FIELDS}})
+    return stages
+
+
+def fetch_page(collection, token, query, sort_field="blockNumber", ascending=True, page_size=DEFAULT_PAGE_SIZE,
+               after=None, range_field=None, value_range=None):
+    """Return one page of the filtered table and the cursor of the next page (None on the last page)"""
+    stages = page_pipeline(token, query, sort_field, ascending, page_size, after, range_field, value_range)
+    rows = list(collection.aggregate(stages))
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1].get(sort_field), rows[-1]["_id"])
+    page = pd.DataFrame(rows, columns=["_id"] + TABLE_FIELDS)
+    return page.drop(columns=["_id"]), next_cursor
+
+
+def count_transactions(collection, token, query, range_field=None, value_range=None):
+    if range_field is None or value_range is None or range_field not in DERIVED_FIELDS:
+        return collection.count_documents({"$and": [query, range_filter(range_field, value_range)]})
+    result = list(collection.aggregate(_pipeline(token, query, range_field, value_range) + [{"$count": "n"}]))
+    return result[0]["n"] if result else 0
+
+
+def value_bounds(collection, token, query, field):
+    """(min, max) of a table field over the filtered rows, or (None, None) without data"""
+    stages = _pipeline(token, query) + [{"$group": {"_id": None, "lo": {"$min": f"${field}"}, "hi": {"$max": f"${field}"}}}]
+    result = list(collection.aggregate(stages))
+    if not result:
+        return None, None
+    return result[0]["lo"], result[0]["hi"]
+
+
+class MongoTransactionSource:
+    """Transaction table of one token served page by page from its swap collection.
+
+    `filters` are the keyword arguments of `transaction_filter`; page cursors are
+    `(sort value, _id)` pairs.
+    """
+
+    def __init__(self, collection, token):
+        self.collection = collection
+        self.token = token
+
+    def page(self, filters, sort_field="blockNumber", ascending=True, page_size=DEFAULT_PAGE_SIZE,
+             after=None, range_field=None, value_range=None):
+        return fetch_page(self.collection, self.token, transaction_filter(**filters), sort_field, ascending,
+                          page_size, after, range_field, value_range)
+
+    def count(self, filters, range_field=None, value_range=None):
+        return count_transactions(self.collection, self.token, transaction_filter(**filters), range_field, value_range)
+
+    def value_bounds(self, filters, field):
+        return value_bounds(self.collection, self.token, transaction_filter(**filters), field)
+
+    def label_options(self):
+        return label_options(self.collection)
+
+    def time_bounds(self):
+        return time_bounds(self.collection)
+
+
+def label_options(collection):
+    return sorted(label for label in collection.distinct("label") if label is not None)
+
+
+def time_bounds(collection):
+    """UTC datetimes of the first and last swap, or (None, None) for an empty collection"""
+    first = collection.find_one({"timestamp": {"$ne": None}}, {"timestamp": 1}, sort=[("timestamp", 1)])
+    last = collection.find_one({"timestamp": {"$ne": None}}, {"timestamp": 1}, sort=[("timestamp", -1)])
+    if first is None:
+        return None, None
+    return (pd.to_datetime(first["timestamp"], unit="s", utc=True),
+            pd.to_datetime(last["timestamp"], unit="s", utc=True))
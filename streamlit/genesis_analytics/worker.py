@@ -0,0 +1,70 @@
+"""Background worker that materializes the sniper PnL table on a schedule.
+
+Runs load -> detect -> PnL against Mongo and publishes each result as a versioned
+snapshot, so the dashboards only read the latest table instead of recomputing it per
+session. The swap store stays resident between runs, so later runs only fetch new swaps.
+
+    python -m genesis_analytics.worker [--interval 300] [--output DIR] [--once]
+
+Without --output, snapshots go to the `sniper_pnl` collection. The interval defaults to
+SNIPER_PNL_INTERVAL; set it to the same value for the dashboards, which treat a snapshot
+older than twice the interval as stale (see `snapshots`).
+"""
+import argparse
+import time
+import traceback
+
+from genesis_analytics import engine
+from genesis_analytics.mirror import SwapMirror
+from genesis_analytics.schema import memory_mb
+from genesis_analytics.snapshots import SNAPSHOT_INTERVAL, FileSnapshotSink, MongoSnapshotSink
+from genesis_analytics.swaps import IncrementalSwapStore
+
+
+def run_once(store, db, sink):
+    """Refresh the swaps, recompute the PnL table and publish it; returns the snapshot version"""
+    start = time.perf_counter()
+    combined_df = engine.load(db, store=store)
+    if combined_df is None:
+        print("No data found from MongoDB collections.")
+        return None
+    potential_sniper_df = engine.detect(combined_df, engine.launch_blocks(db, combined_df))
+    pnl_df = engine.pnl(potential_sniper_df, combined_df, latest_prices=store.latest_prices)
+    meta = {
+        "high_water": {col: int(block) for col, block in store.high_water.items()},
+        "swap_rows": len(combined_df),
+        "memory_mb": {stage: round(memory_mb(df), 2)
+                      for stage, df in (("load", combined_df), ("detect", potential_sniper_df), ("pnl", pnl_df))},
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    version = sink.publish(pnl_df, meta)
+    print(f"Published snapshot {version}: {len(pnl_df)} rows from {len(combined_df)} swaps in {meta['seconds']}s")
+    return version
+
+
+def main(argv=None):
+    from genesis_analytics.db import swap_db
+
+    parser = argparse.ArgumentParser(description="Materialize sniper PnL snapshots on a schedule")
+    parser.add_argument("--interval", type=float, default=SNAPSHOT_INTERVAL, help="seconds between runs")
+    parser.add_argument("--output", help="write Parquet snapshots to this directory instead of Mongo")
+    parser.add_argument("--once", action="store_true", help="run a single time and exit")
+    args = parser.parse_args(argv)
+
+    db = swap_db()
+    sink = FileSnapshotSink(args.output) if args.output else MongoSnapshotSink(db)
+    store = IncrementalSwapStore(db, mirror=SwapMirror())
+    while True:
+        try:
+            run_once(store, db, sink)
+        except Exception:
+            if args.once:
+                raise
+            traceback.print_exc()
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
-import os
-from dotenv import load_dotenv
+import numpy as np
 import pandas as pd
 import streamlit as st
-from pymongo import MongoClient
 from datetime import timedelta
+from genesis_analytics import spans
+from genesis_analytics.db import persona_db
+from genesis_analytics.transactions import derive_amounts
 
 # ───── Streamlit Setup ─────
 st.set_page_config(layout="wide")
+spans.start_run("tokendatatest", count_bytes=bool(st.query_params.get("perf")))
 
 # ───── Global Styling ─────
 st.markdown("""
@@ -49,9 +51,7 @@ with st.sidebar:
     st.markdown("Made for Genesis Analytics.")
 
 # ───── Load DB Connection ─────
-load_dotenv()
-client = MongoClient(os.environ.get("MongoLink"))
-db = client['virtualgenesis']
+db = persona_db()
 
 # ───── Token Parameter ─────
 query_params = st.query_params
@@ -70,44 +70,44 @@ virtual_out_col = "Virtual_OUT"
 collection_name = f"{token}_swap"
 
 # ───── Fetch Data ─────
-data = list(db[collection_name].find({}, {
-    "blockNumber": 1, "txHash": 1, "maker": 1, "swapType": 1, "label": 1, "timestampReadable": 1,
-    token_in_col: 1, token_out_col: 1, virtual_in_col: 1, virtual_out_col: 1,
-    "genesis_usdc_price": 1, "genesis_virtual_price": 1, "virtual_usdc_price": 1
-}))
-tabdf = pd.DataFrame(data)
+with spans.span("fetch") as record:
+    data = list(db[collection_name].find({}, {
+        "blockNumber": 1, "txHash": 1, "maker": 1, "swapType": 1, "label": 1, "timestampReadable": 1,
+        token_in_col: 1, token_out_col: 1, virtual_in_col: 1, virtual_out_col: 1,
+        "genesis_usdc_price": 1, "genesis_virtual_price": 1, "virtual_usdc_price": 1
+    }))
+    record["rows_out"] = len(data)
+with spans.span("build_frame", rows_in=len(data)):
+    tabdf = pd.DataFrame(data)
 
 # ───── Process Data ─────
-def extract_amount(row):
-    if row.get("swapType") == "buy":
-        return pd.Series([row.get(token_out_col), row.get(virtual_in_col)])
-    elif row.get("swapType") == "sell":
-        return pd.Series([row.get(token_in_col), row.get(virtual_out_col)])
-    return pd.Series([None, None])
-
-tabdf[["TokenAmount", "Virtual"]] = tabdf.apply(extract_amount, axis=1)
-tabdf["TokenAmount"] = pd.to_numeric(tabdf["TokenAmount"]).round(4)
-tabdf["Virtual"] = pd.to_numeric(tabdf["Virtual"]).round(4)
-tabdf.rename(columns={"TokenAmount": token.upper()}, inplace=True)
-
-tabdf["txHash"] = tabdf["txHash"].apply(lambda tx: f"<a href='https://basescan.org/tx/{tx}' target='_blank'>Link to txn</a>")
-tabdf["swapType"] = tabdf["swapType"].apply(lambda x: f"<span style='color: {'green' if x == 'buy' else 'red'}; font-weight:bold'>{x}</span>")
-
-tabdf = tabdf[[
-    "blockNumber", "txHash", "maker", "swapType", "label", "timestampReadable",
-    token.upper(), "Virtual", "genesis_usdc_price", "genesis_virtual_price", "virtual_usdc_price"
-]].rename(columns={
-    "blockNumber": "BLOCK", "txHash": "TX HASH", "maker": "MAKER",
-    "swapType": "TX TYPE", "label": "SWAP TYPE", "timestampReadable": "TIME",
-    "Virtual": "VIRTUAL",
-    "genesis_usdc_price": "GENESIS \nPRICE ($)",
-    "genesis_virtual_price": "GENESIS PRICE \n($VIRTUAL)",
-    "virtual_usdc_price": "VIRTUAL \nPRICE ($)"
-})
-tabdf["MAKER"] = tabdf["MAKER"].apply(lambda addr: f"<span title='{addr}'>{addr[:10]}...</span>" if isinstance(addr, str) else addr)
-tabdf["TIME_PARSED"] = pd.to_datetime(tabdf["TIME"], errors='coerce')
-tabdf["TX_TYPE_RAW"] = tabdf["TX TYPE"].str.extract(r">(\w+)<")
-tabdf["USD VALUE (GENESIS)"] = (tabdf[token.upper()] * tabdf["GENESIS \nPRICE ($)"]).round(4)
+# Raw values only; display strings are built for the rendered rows in html_cells
+with spans.span("process", rows_in=len(tabdf)):
+    tabdf = tabdf.join(derive_amounts(tabdf, token))
+    tabdf = tabdf[[
+        "blockNumber", "txHash", "maker", "swapType", "label", "timestampReadable",
+        "token_amount", "virtual_amount", "genesis_usdc_price", "genesis_virtual_price", "virtual_usdc_price", "tx_value"
+    ]].rename(columns={
+        "blockNumber": "BLOCK", "txHash": "TX HASH", "maker": "MAKER",
+        "swapType": "TX TYPE", "label": "SWAP TYPE", "timestampReadable": "TIME",
+        "token_amount": token.upper(), "virtual_amount": "VIRTUAL",
+        "genesis_usdc_price": "GENESIS \nPRICE ($)",
+        "genesis_virtual_price": "GENESIS PRICE \n($VIRTUAL)",
+        "virtual_usdc_price": "VIRTUAL \nPRICE ($)",
+        "tx_value": "USD VALUE (GENESIS)"
+    })
+    tabdf["TIME_PARSED"] = pd.to_datetime(tabdf["TIME"], errors='coerce')
+
+def html_cells(df):
+    """Link, colour and shorten the raw cells of the rows being rendered"""
+    df = df.copy()
+    df["TX HASH"] = "<a href='https://basescan.org/tx/" + df["TX HASH"].astype(str) + "' target='_blank'>Link to txn</a>"
+    colors = np.where(df["TX TYPE"] == "buy", "green", "red")
+    df["TX TYPE"] = "<span style='color: " + colors + "; font-weight:bold'>" + df["TX TYPE"].astype(str) + "</span>"
+    makers = df["MAKER"].where(df["MAKER"].map(type) == str)
+    df["MAKER"] = ("<span title='" + makers + "'>" + makers.str[:10] + "...</span>").fillna(df["MAKER"])
+    return df
+
 filtered_df = tabdf.copy()
 st.write("COLUMNS:", filtered_df.columns.tolist())
 
@@ -148,7 +148,7 @@ with st.container():
 
 # ───── Apply Filters ─────
 if swap_filter != "all":
-    filtered_df = filtered_df[filtered_df["TX_TYPE_RAW"].str.lower() == swap_filter.lower()]
+    filtered_df = filtered_df[filtered_df["TX TYPE"].str.lower() == swap_filter.lower()]
 if label_filter != "All":
     filtered_df = filtered_df[filtered_df["SWAP TYPE"] == label_filter]
 if isinstance(date_range, tuple) and len(date_range) == 2:
@@ -180,7 +180,7 @@ with st.container():
 
 #--TABLE RENDERING
 filtered_df = filtered_df.sort_values(by=sort_col, ascending=(sort_dir == "Ascending"))
-filtered_df = filtered_df.drop(columns=["TX_TYPE_RAW", "TIME_PARSED"], errors="ignore")
+filtered_df = filtered_df.drop(columns=["TIME_PARSED"], errors="ignore")
 #ordering columns
 ordered_cols = [
     "BLOCK", "TX HASH", "MAKER", "TX TYPE", "SWAP TYPE", "TIME",
@@ -189,7 +189,8 @@ ordered_cols = [
 ]
 filtered_df = filtered_df[[col for col in ordered_cols if col in filtered_df.columns]]
 
-html_table = filtered_df.to_html(escape=False, index=False)
+with spans.span("build_html", rows_in=len(filtered_df)):
+    html_table = html_cells(filtered_df).to_html(escape=False, index=False)
 #-- CSS FOR THE TABLE
 scrollable_style = """
 <style>
@@ -215,6 +216,11 @@ scrollable_style = """
 </style>
 """
 
-with st.container():
+with st.container(), spans.span("render_table", rows_in=len(filtered_df)):
     st.markdown(scrollable_style, unsafe_allow_html=True)
     st.markdown(f"<div class='scrollable'>{html_table}</div>", unsafe_allow_html=True)
+
+# ───── Performance Panel (?perf=1) ─────
+if st.query_params.get("perf"):
+    with st.sidebar.expander("Performance", expanded=True):
+        st.dataframe(spans.run_frame(), hide_index=True)